@@ -0,0 +1,178 @@
+"""Streaming movie sources for ingestion.
+
+Every reader is a generator that yields one raw movie dict at a time, so a
+catalog is never held in memory as a whole. Yielded dicts use the same keys
+as `data/movies.py` (name, description, year, director, cast, themes) and
+are validated by the ingest pipeline, not here. Records that cannot be
+decoded at all (malformed JSON, a line that is not an object, a CSV row that
+does not parse) are yielded as SkippedRecord instead of raising, so one bad
+line does not abort a whole ingest; ingest reports them as skipped movies.
+
+Supported formats:
+    .jsonl: One JSON object per line.
+    .csv: One movie per row; cast/themes are "|"-separated or JSON arrays.
+    .parquet: Read in record batches (requires pyarrow).
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Union
+
+from data.movies import movies
+
+LIST_FIELDS = ("cast", "themes")
+
+
+@dataclass
+class SkippedRecord:
+    """A source record that could not be decoded into a movie dict.
+
+    Attributes:
+        location: Where the record is, as "path:line".
+        reason: Why it was skipped.
+    """
+
+    location: str
+    reason: str
+
+
+SourceRecord = Union[dict, SkippedRecord]
+
+
+def iter_builtin_movies() -> Iterator[dict]:
+    """Yield the bundled movies from data/movies.py."""
+    yield from movies
+
+
+def iter_jsonl(path: str) -> Iterator[SourceRecord]:
+    """Yield movies from a JSON Lines file.
+
+    Args:
+        path: Path to the .jsonl file.
+
+    Yields:
+        Raw movie dicts, or a SkippedRecord for each non-empty line that is
+        not a JSON object.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield SkippedRecord(f"{path}:{line_no}", f"invalid JSON ({exc.msg})")
+                continue
+            if not isinstance(record, dict):
+                yield SkippedRecord(f"{path}:{line_no}", "expected a JSON object")
+                continue
+            yield record
+
+
+def iter_csv(path: str, list_separator: str = "|") -> Iterator[SourceRecord]:
+    """Yield movies from a CSV file with a header row.
+
+    Args:
+        path: Path to the .csv file.
+        list_separator: Separator used inside the cast and themes columns.
+
+    Yields:
+        Raw movie dicts with year converted to int and list fields split, or
+        a SkippedRecord for each row that does not parse or has more fields
+        than the header.
+    """
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                yield SkippedRecord(f"{path}:{reader.line_num}", f"invalid CSV row ({exc})")
+                continue
+            if None in row:
+                yield SkippedRecord(f"{path}:{reader.line_num}", "more fields than the header")
+                continue
+            yield _coerce_row(row, list_separator)
+
+
+def iter_parquet(path: str, batch_size: int = 1024) -> Iterator[dict]:
+    """Yield movies from a Parquet file, one record batch at a time.
+
+    Args:
+        path: Path to the .parquet file.
+        batch_size: Rows decoded per record batch.
+
+    Yields:
+        Raw movie dicts. Rows are typed by the file schema, so bad values
+        surface as validation skips in ingest; a corrupt file still raises.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Reading Parquet sources requires pyarrow: pip install pyarrow") from exc
+
+    parquet_file = pq.ParquetFile(path)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield from record_batch.to_pylist()
+
+
+READERS: Dict[str, Callable[[str], Iterator[SourceRecord]]] = {
+    ".jsonl": iter_jsonl,
+    ".csv": iter_csv,
+    ".parquet": iter_parquet,
+}
+
+
+def open_movie_source(path: str) -> Iterator[SourceRecord]:
+    """Pick a streaming reader from the file extension.
+
+    Args:
+        path: Path to a .jsonl, .csv or .parquet file.
+
+    Returns:
+        Generator of raw movie dicts and SkippedRecord entries.
+
+    Raises:
+        ValueError: If the extension has no registered reader.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension)
+    if reader is None:
+        raise ValueError(f"Unsupported movie source '{path}'; expected one of {sorted(READERS)}")
+    return reader(path)
+
+
+def _coerce_row(row: Dict[str, Any], list_separator: str) -> dict:
+    movie: Dict[str, Any] = dict(row)
+    year = movie.get("year")
+    if isinstance(year, str) and year.strip().lstrip("-").isdigit():
+        movie["year"] = int(year)
+    for field in LIST_FIELDS:
+        if field in movie:
+            movie[field] = _split_list(movie[field], list_separator)
+    return movie
+
+
+def _split_list(value: Any, separator: str) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    text = str(value).strip()
+    if text.startswith("["):
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, list):
+            return parsed
+    return [part.strip() for part in text.split(separator) if part.strip()]
@@ -0,0 +1,156 @@
+"""Server capability detection and circuit breaking for optional Qdrant features.
+
+Retrieval paths that depend on an optional feature (currently the "bm25"
+sparse vector of a collection) ask this module whether to use it instead of
+sending a request that is known to fail. The first call probes the
+collection once; the answer is remembered. A failed probe or a failed query
+opens the circuit: callers go straight to their fallback until a backoff
+delay expires, then the feature is probed again. The delay doubles on every
+consecutive failure and resets after a successful query.
+
+Every probe, failure and short-circuited call is counted; capability_metrics()
+exposes the counters (e.g. for evaluation reports).
+
+Constants:
+    BACKOFF_INITIAL_SECONDS: Delay before the first re-probe after a failure.
+    BACKOFF_MAX_SECONDS: Upper bound of the re-probe delay.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from db.qdrant_client import SPARSE_VECTOR_NAME, get_client
+
+BACKOFF_INITIAL_SECONDS = 5.0
+BACKOFF_MAX_SECONDS = 300.0
+
+BM25_SPARSE_VECTOR = "bm25_sparse_vector"
+
+_LOCK = threading.Lock()
+_METRICS: Counter = Counter()
+
+
+class CircuitBreaker:
+    """Availability of one capability on one collection, with re-probe backoff.
+
+    Attributes:
+        available: Result of the last probe or query (None before the first probe).
+        retry_at: Monotonic time after which an unavailable capability is re-probed.
+        backoff: Delay applied at the next failure.
+    """
+
+    def __init__(self, initial_backoff: float = BACKOFF_INITIAL_SECONDS, max_backoff: float = BACKOFF_MAX_SECONDS) -> None:
+        self.available: Optional[bool] = None
+        self.retry_at = 0.0
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.backoff = initial_backoff
+
+    def needs_probe(self, now: float) -> bool:
+        return self.available is None or (not self.available and now >= self.retry_at)
+
+    def record_probe(self, available: bool, now: float) -> None:
+        if available:
+            self.available = True
+        else:
+            self.record_failure(now)
+
+    def record_success(self) -> None:
+        self.available = True
+        self.backoff = self.initial_backoff
+
+    def record_failure(self, now: float) -> None:
+        self.available = False
+        self.retry_at = now + self.backoff
+        self.backoff = min(self.backoff * 2, self.max_backoff)
+
+
+_BREAKERS: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+
+def probe_bm25_sparse_vector(collection_name: str) -> bool:
+    """Return True if the collection (or alias) has the "bm25" sparse vector."""
+    try:
+        info = get_client().get_collection(collection_name)
+    except Exception:
+        return False
+    sparse_vectors = info.config.params.sparse_vectors or {}
+    return SPARSE_VECTOR_NAME in sparse_vectors
+
+
+_PROBES: Dict[str, Callable[[str], bool]] = {
+    BM25_SPARSE_VECTOR: probe_bm25_sparse_vector,
+}
+
+
+def probe_due(capability: str, collection_name: str) -> bool:
+    """Return True if the next capability_available() call would probe the server."""
+    with _LOCK:
+        breaker = _BREAKERS.get((capability, collection_name))
+        return breaker is None or breaker.needs_probe(time.monotonic())
+
+
+def capability_available(capability: str, collection_name: str) -> bool:
+    """Decide whether to use a capability, probing it when due.
+
+    Args:
+        capability: Capability name (e.g. BM25_SPARSE_VECTOR).
+        collection_name: Collection (or alias) the capability belongs to.
+
+    Returns:
+        True if callers should use the capability, False if they should go
+        straight to their fallback (counted as a short circuit).
+    """
+    key = (capability, collection_name)
+    now = time.monotonic()
+    with _LOCK:
+        breaker = _BREAKERS.setdefault(key, CircuitBreaker())
+        probe = breaker.needs_probe(now)
+        if probe:
+            # Hold off concurrent callers while this one probes.
+            breaker.available = False
+            breaker.retry_at = float("inf")
+
+    if probe:
+        available = _PROBES[capability](collection_name)
+        with _LOCK:
+            _METRICS[f"{capability}.probes"] += 1
+            breaker.record_probe(available, time.monotonic())
+
+    with _LOCK:
+        if breaker.available:
+            return True
+        _METRICS[f"{capability}.short_circuits"] += 1
+        return False
+
+
+def record_capability_success(capability: str, collection_name: str) -> None:
+    """Report a successful call so the backoff resets."""
+    with _LOCK:
+        breaker = _BREAKERS.get((capability, collection_name))
+        if breaker is not None:
+            breaker.record_success()
+
+
+def record_capability_failure(capability: str, collection_name: str) -> None:
+    """Report a failed call: open the circuit until the next re-probe."""
+    with _LOCK:
+        breaker = _BREAKERS.setdefault((capability, collection_name), CircuitBreaker())
+        breaker.record_failure(time.monotonic())
+        _METRICS[f"{capability}.failures"] += 1
+
+
+def capability_metrics() -> Dict[str, int]:
+    """Return probe, failure and short-circuit counters since start (or reset)."""
+    with _LOCK:
+        return dict(_METRICS)
+
+
+def reset_capabilities() -> None:
+    """Forget probe results and counters (e.g. after a schema migration)."""
+    with _LOCK:
+        _BREAKERS.clear()
+        _METRICS.clear()
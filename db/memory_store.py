@@ -0,0 +1,338 @@
+"""In-process exact dense search over a collection held in memory.
+
+Used by `dense_backend="memory"`. Every dense vector of a collection is
+loaded once (one paginated scroll) into a contiguous float32 matrix with
+L2-normalized rows, next to the point ids and column-wise payload fields.
+A query is one matrix-vector product (one matrix product for a batch of
+queries) followed by a partial sort for the top k, so results are exact and
+no request leaves the process. Qdrant filters are applied as boolean masks
+built from the payload columns.
+
+Memory is about 4 * dim bytes per point for the matrix plus the payload
+fields, so the store suits catalogs up to around a million points. Loading
+stays close to that: the matrix is preallocated from the collection's point
+count and filled one scroll page at a time, and rows are normalized in place.
+
+Like the local BM25 index, a loaded store is reloaded when its collection
+changes (stats file rewritten by an ingest, points added or deleted, alias
+repointed), checked at most every STORE_CHECK_SECONDS.
+
+Constants:
+    STORE_CHECK_SECONDS: Minimum delay between two change checks of a loaded store.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue
+
+from db.qdrant_client import DENSE_VECTOR_NAME, collection_version, get_client, scroll_points
+from sparse.corpus_stats import stats_mtime
+
+# Rows copied into the matrix at a time while loading (one scroll page).
+_FILL_ROWS = 1000
+
+STORE_CHECK_SECONDS = 10.0
+
+# Collection name -> (collection version, time of the last check, store).
+_STORES: Dict[str, Tuple[Any, float, "MemoryDenseStore"]] = {}
+_STORE_LOCK = threading.Lock()
+
+
+class MemoryDenseStore:
+    """Dense vectors and payload columns of one collection.
+
+    Attributes:
+        ids: Qdrant point id (as str) of each row.
+        vectors: C-contiguous float32 matrix, one L2-normalized row per point.
+        columns: Payload field to per-row values.
+        rows_by_id: Point id to row.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        columns: Dict[str, List[Any]],
+        copy: bool = True,
+    ) -> None:
+        self.ids = ids
+        if copy:
+            vectors = np.array(vectors, dtype=np.float32, order="C")
+        else:
+            # The caller hands over the matrix; normalize it without a second copy.
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))[:, None]
+        vectors /= np.where(norms > 0, norms, 1.0)
+        self.vectors = vectors
+        self.columns = columns
+        self.rows_by_id = {point_id: row for row, point_id in enumerate(ids)}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._postings: Dict[str, Dict[Any, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_points(
+        cls,
+        points: Iterable[Any],
+        payload_fields: Sequence[str],
+        dim: int = 0,
+        count: int = 0,
+    ) -> "MemoryDenseStore":
+        """Build a store from Qdrant points carrying the dense vector.
+
+        Vectors are copied into a preallocated float32 matrix in chunks of
+        one scroll page, so the points are never held as Python lists all at
+        once. The matrix grows if there are more points than `count`.
+
+        Args:
+            points: Records with id, payload and the dense vector (e.g. from scroll_points).
+            payload_fields: Payload fields to keep as columns.
+            dim: Vector size; taken from the first vector when it differs.
+            count: Expected number of points, used to size the matrix.
+
+        Returns:
+            Populated store. Points without a dense vector are skipped.
+        """
+        ids: List[str] = []
+        vectors = np.empty((max(count, 0), dim), dtype=np.float32)
+        rows: List[Any] = []
+        columns: Dict[str, List[Any]] = {field: [] for field in payload_fields}
+        for point in points:
+            vector = point.vector.get(DENSE_VECTOR_NAME) if isinstance(point.vector, dict) else None
+            if vector is None:
+                continue
+            payload = point.payload or {}
+            ids.append(str(point.id))
+            rows.append(vector)
+            for field, column in columns.items():
+                column.append(payload.get(field))
+            if len(rows) == _FILL_ROWS:
+                vectors = _fill_rows(vectors, len(ids) - len(rows), rows)
+                rows = []
+        if rows:
+            vectors = _fill_rows(vectors, len(ids) - len(rows), rows)
+        if vectors.shape[0] != len(ids):
+            vectors.resize((len(ids), vectors.shape[1]), refcheck=False)
+        return cls(ids, vectors, columns, copy=False)
+
+    def payload(self, row: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Assemble the payload of a row from its columns (all stored fields by default)."""
+        if fields is None:
+            fields = list(self.columns)
+        return {field: self.columns[field][row] for field in fields if field in self.columns}
+
+    def filter_mask(self, query_filter: Optional[Filter]) -> Optional[np.ndarray]:
+        """Translate a Qdrant filter into a boolean row mask.
+
+        Supports what retrieval's filters use: `must` field conditions with a
+        range, MatchValue or MatchAny. Range conditions exclude rows without
+        a numeric value; keyword matches on list fields match any element.
+
+        Args:
+            query_filter: Filter to apply, or None.
+
+        Returns:
+            Boolean array with one entry per row, or None when nothing is filtered.
+
+        Raises:
+            ValueError: If the filter uses clauses or conditions the store cannot evaluate.
+        """
+        if query_filter is None:
+            return None
+        if query_filter.should or query_filter.must_not or getattr(query_filter, "min_should", None):
+            raise ValueError("Memory store filters support only `must` conditions")
+        must = query_filter.must or []
+        if not isinstance(must, list):
+            must = [must]
+        if not must:
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+        for condition in must:
+            if not isinstance(condition, FieldCondition) or condition.key not in self.columns:
+                raise ValueError(f"Unsupported memory store filter condition: {condition!r}")
+            if condition.range is not None:
+                values = self._numeric_column(condition.key)
+                bounds = condition.range
+                with np.errstate(invalid="ignore"):
+                    if bounds.gte is not None:
+                        mask &= values >= bounds.gte
+                    if bounds.gt is not None:
+                        mask &= values > bounds.gt
+                    if bounds.lte is not None:
+                        mask &= values <= bounds.lte
+                    if bounds.lt is not None:
+                        mask &= values < bounds.lt
+                    mask &= ~np.isnan(values)
+            elif isinstance(condition.match, MatchValue):
+                mask &= self._match_rows(condition.key, [condition.match.value])
+            elif isinstance(condition.match, MatchAny):
+                mask &= self._match_rows(condition.key, condition.match.any)
+            else:
+                raise ValueError(f"Unsupported memory store filter condition: {condition!r}")
+        return mask
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return the exact top rows for one query (see search_many)."""
+        return self.search_many(np.asarray([query_vector], dtype=np.float32), limit, mask)[0]
+
+    def search_many(
+        self,
+        query_vectors: np.ndarray,
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """Return the exact top rows for a batch of queries by cosine similarity.
+
+        Args:
+            query_vectors: (queries x dim) matrix.
+            limit: Maximum number of results per query.
+            mask: Optional boolean row mask (see filter_mask).
+
+        Returns:
+            One list of (row, score) pairs per query, best first; ties keep row order.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[0] == 0:
+            return []
+        if limit <= 0 or len(self) == 0:
+            return [[] for _ in range(queries.shape[0])]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        if rows.size == 0:
+            return [[] for _ in range(queries.shape[0])]
+        # Filtered searches score only the rows that pass the filter.
+        matrix = self.vectors[rows] if rows.size < len(self) else self.vectors
+        scores = queries @ matrix.T
+
+        results: List[List[Tuple[int, float]]] = []
+        for row_scores in scores:
+            candidates = rows
+            if rows.size > limit:
+                # Keep everything tied with the k-th best so the tie order below is stable.
+                top = np.argpartition(row_scores, rows.size - limit)[rows.size - limit:]
+                kth = row_scores[top].min()
+                selected = np.flatnonzero(row_scores >= kth)
+                candidates = rows[selected]
+                row_scores = row_scores[selected]
+            order = np.lexsort((candidates, -row_scores))[:limit]
+            results.append([(int(candidates[i]), float(row_scores[i])) for i in order])
+        return results
+
+    def vectors_by_id(self, point_ids: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return the stored (normalized) vectors of the given points that exist."""
+        rows_by_id = self.rows_by_id
+        return {point_id: self.vectors[rows_by_id[point_id]] for point_id in point_ids if point_id in rows_by_id}
+
+    def _numeric_column(self, field: str) -> np.ndarray:
+        values = self._numeric.get(field)
+        if values is None:
+            values = np.fromiter(
+                (
+                    value if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+                    for value in self.columns[field]
+                ),
+                dtype=np.float64,
+                count=len(self),
+            )
+            self._numeric[field] = values
+        return values
+
+    def _match_rows(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        postings = self._postings.get(field)
+        if postings is None:
+            grouped: Dict[Any, List[int]] = {}
+            for row, value in enumerate(self.columns[field]):
+                for item in value if isinstance(value, list) else (value,):
+                    if item is not None:
+                        grouped.setdefault(item, []).append(row)
+            postings = {item: np.asarray(rows, dtype=np.int64) for item, rows in grouped.items()}
+            self._postings[field] = postings
+        mask = np.zeros(len(self), dtype=bool)
+        for value in values:
+            rows = postings.get(value)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+
+def _fill_rows(matrix: np.ndarray, start: int, rows: List[Any]) -> np.ndarray:
+    block = np.asarray(rows, dtype=np.float32)
+    end = start + block.shape[0]
+    if matrix.shape[1] != block.shape[1]:
+        if start:
+            raise ValueError(f"Dense vector size changed from {matrix.shape[1]} to {block.shape[1]}")
+        matrix = np.empty((max(matrix.shape[0], end), block.shape[1]), dtype=np.float32)
+    elif end > matrix.shape[0]:
+        matrix.resize((max(end, matrix.shape[0] * 3 // 2), matrix.shape[1]), refcheck=False)
+    matrix[start:end] = block
+    return matrix
+
+
+def get_memory_store(collection_name: str, payload_fields: Sequence[str]) -> MemoryDenseStore:
+    """Get the store of a collection, loading it on first use.
+
+    The store is reloaded when the collection has changed since it was
+    loaded (checked at most every STORE_CHECK_SECONDS).
+
+    Args:
+        collection_name: Qdrant collection (or alias) to load.
+        payload_fields: Payload fields to keep; fixed when the store is first loaded.
+
+    Returns:
+        Shared MemoryDenseStore instance.
+    """
+    now = time.monotonic()
+    cached = _STORES.get(collection_name)
+    if cached is not None and now - cached[1] < STORE_CHECK_SECONDS:
+        return cached[2]
+    client = get_client()
+    version = (stats_mtime(collection_name), *collection_version(client, collection_name))
+    with _STORE_LOCK:
+        cached = _STORES.get(collection_name)
+        if cached is not None and cached[0] == version:
+            store = cached[2]
+        else:
+            info = client.get_collection(collection_name)
+            points = scroll_points(
+                client,
+                collection_name,
+                with_payload=list(payload_fields),
+                with_vectors=[DENSE_VECTOR_NAME],
+                page_size=_FILL_ROWS,
+            )
+            store = MemoryDenseStore.from_points(
+                points,
+                payload_fields,
+                dim=info.config.params.vectors[DENSE_VECTOR_NAME].size,
+                count=info.points_count or 0,
+            )
+        _STORES[collection_name] = (version, now, store)
+    return store
+
+
+def invalidate_memory_store(collection_name: Optional[str] = None) -> None:
+    """Drop a loaded store (or all of them) so the next query reloads it.
+
+    Args:
+        collection_name: Collection whose store to drop; None drops every store.
+    """
+    with _STORE_LOCK:
+        if collection_name is None:
+            _STORES.clear()
+        else:
+            _STORES.pop(collection_name, None)
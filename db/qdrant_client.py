@@ -2,32 +2,57 @@
 
 This module handles initialization and configuration of the Qdrant vector
 database client. It manages multiple vector indices for different chunking
-strategies and provides utilities for collection setup.
+strategies and provides utilities for collection setup, including
+versioned collections served through an alias for zero-downtime reindexing.
 
 Constants:
     COLLECTION_NAME: Default collection name in Qdrant database.
     VECTOR_NAMES: List of vector field names corresponding to chunking strategies.
+    SPARSE_VECTOR_NAME: Named sparse vector holding BM25 document term weights.
+    HNSW_M: HNSW graph degree restored after a bulk load.
+    INDEXING_THRESHOLD_KB: Optimizer indexing threshold restored after a bulk load.
+    BULK_LOAD_SETTLE_SECONDS: How long a bulk-loaded collection must stay green
+        before it counts as indexed when the optimizer was never seen working.
 """
 from __future__ import annotations
 
 import os
+import re
+import secrets
+import time
+from typing import Any, Iterator, List, Optional, Tuple
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
+    CollectionStatus,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
     Distance,
+    Filter,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
     PayloadSchemaType,
     TextIndexParams,
     TextIndexType,
     TokenizerType,
     Language,
+    Modifier,
+    SparseVectorParams,
     VectorParams,
 )
 
 COLLECTION_NAME = "my_movies"
 DENSE_VECTOR_NAME = "dense"
+SPARSE_VECTOR_NAME = "bm25"
 VECTOR_NAMES = [DENSE_VECTOR_NAME]
+HNSW_M = 16
+INDEXING_THRESHOLD_KB = 20000
+BULK_LOAD_SETTLE_SECONDS = 5.0
 
 _CLIENT: QdrantClient | None = None
+_ASYNC_CLIENT: AsyncQdrantClient | None = None
 
 
 def _client_config() -> dict:
@@ -61,6 +86,21 @@ def get_client() -> QdrantClient:
     return _CLIENT
 
 
+def get_async_client() -> AsyncQdrantClient:
+    """Get or create a singleton async Qdrant client instance.
+    
+    Uses the same QDRANT_URL / QDRANT_API_KEY configuration as get_client().
+    The client is meant to be used from a single event loop.
+    
+    Returns:
+        AsyncQdrantClient instance.
+    """
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        _ASYNC_CLIENT = AsyncQdrantClient(**_client_config())
+    return _ASYNC_CLIENT
+
+
 def _create_payload_indexes(client: QdrantClient, collection_name: str) -> None:
     client.create_payload_index(
         collection_name=collection_name,
@@ -99,17 +139,294 @@ def _create_payload_indexes(client: QdrantClient, collection_name: str) -> None:
     )
 
 
-def recreate_collection(client: QdrantClient, collection_name: str = COLLECTION_NAME, vector_size: int = 384) -> None:
+def _vectors_config(vector_size: int) -> dict:
+    return {DENSE_VECTOR_NAME: VectorParams(size=vector_size, distance=Distance.COSINE)}
+
+
+def _sparse_vectors_config() -> dict:
+    # Points store BM25 term-frequency weights; Qdrant applies IDF at query time.
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def recreate_collection(
+    client: QdrantClient,
+    collection_name: str = COLLECTION_NAME,
+    vector_size: int = 384,
+    bulk_load: bool = False,
+) -> None:
     """Create or recreate a Qdrant collection for movie-level retrieval.
     
-    Initializes a collection with a single dense vector field and
-    payload indexes for filtering and BM25 text search.
+    Initializes a collection with a dense vector field, a BM25 sparse
+    vector field (IDF modifier) and payload indexes for filtering and
+    text search.
+    
+    In bulk-load mode the collection is created with HNSW and optimizer
+    indexing disabled and without payload indexes, so upserts skip index
+    maintenance. Call finish_bulk_load() once all points are uploaded.
     
     Args:
         client: Qdrant client instance.
         collection_name: Name of collection to create.
         vector_size: Dimensionality of embeddings (default 384 for MiniLM).
+        bulk_load: If True, defer HNSW and payload indexing until finish_bulk_load().
+    """
+    if bulk_load:
+        client.recreate_collection(
+            collection_name=collection_name,
+            vectors_config=_vectors_config(vector_size),
+            sparse_vectors_config=_sparse_vectors_config(),
+            hnsw_config=HnswConfigDiff(m=0),
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+        )
+        return
+    client.recreate_collection(
+        collection_name=collection_name,
+        vectors_config=_vectors_config(vector_size),
+        sparse_vectors_config=_sparse_vectors_config(),
+    )
+    _create_payload_indexes(client, collection_name)
+
+
+def finish_bulk_load(
+    client: QdrantClient,
+    collection_name: str = COLLECTION_NAME,
+    timeout: float = 600.0,
+    poll_interval: float = 1.0,
+) -> None:
+    """Build deferred indexes after a bulk load and wait until they are ready.
+    
+    Creates the payload indexes, restores HNSW and optimizer indexing, then
+    blocks until the optimizer has indexed the collection. When the dense
+    vectors are too small to reach the indexing threshold, nothing is built
+    and green status is accepted right away.
+    
+    Args:
+        client: Qdrant client instance.
+        collection_name: Collection created with recreate_collection(bulk_load=True).
+        timeout: Maximum seconds to wait for the optimizer.
+        poll_interval: Seconds between status checks.
+    """
+    restore_indexing(client, collection_name)
+    info = client.get_collection(collection_name=collection_name)
+    dense_bytes = (info.points_count or 0) * info.config.params.vectors[DENSE_VECTOR_NAME].size * 4
+    settle = BULK_LOAD_SETTLE_SECONDS if dense_bytes > INDEXING_THRESHOLD_KB * 1024 else 0.0
+    wait_for_green(client, collection_name, timeout=timeout, poll_interval=poll_interval, settle=settle)
+
+
+def restore_indexing(client: QdrantClient, collection_name: str = COLLECTION_NAME) -> None:
+    """Give a bulk-loaded collection its payload indexes and normal HNSW/optimizer config.
+    
+    Does not wait for the optimizer; finish_bulk_load() does. Also used to
+    leave a failed bulk load with the normal configuration.
     """
-    vectors = {DENSE_VECTOR_NAME: VectorParams(size=vector_size, distance=Distance.COSINE)}
-    client.recreate_collection(collection_name=collection_name, vectors_config=vectors)
     _create_payload_indexes(client, collection_name)
+    client.update_collection(
+        collection_name=collection_name,
+        hnsw_config=HnswConfigDiff(m=HNSW_M),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD_KB),
+    )
+
+
+def wait_for_green(
+    client: QdrantClient,
+    collection_name: str = COLLECTION_NAME,
+    timeout: float = 600.0,
+    poll_interval: float = 1.0,
+    settle: float = 0.0,
+) -> None:
+    """Block until the collection's optimizer reports green status.
+    
+    Right after a config change the optimizer may not have started yet and
+    the collection still reports green. With settle > 0, green only counts
+    once the optimizer has been seen working (a non-green status), every
+    point is indexed, or the status has stayed green for settle seconds.
+    
+    Args:
+        client: Qdrant client instance.
+        collection_name: Collection to poll.
+        timeout: Maximum seconds to wait.
+        poll_interval: Seconds between status checks.
+        settle: Seconds of uninterrupted green status accepted as "indexed".
+        
+    Raises:
+        TimeoutError: If the collection is not green within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    green_since: Optional[float] = None
+    optimizer_seen = False
+    while True:
+        info = client.get_collection(collection_name=collection_name)
+        status = info.status
+        now = time.monotonic()
+        if status == CollectionStatus.GREEN:
+            if green_since is None:
+                green_since = now
+            if (
+                settle <= 0
+                or optimizer_seen
+                or (info.indexed_vectors_count or 0) >= (info.points_count or 0)
+                or now - green_since >= settle
+            ):
+                return
+        else:
+            optimizer_seen = True
+            green_since = None
+        if now >= deadline:
+            raise TimeoutError(f"Collection '{collection_name}' not green after {timeout:.0f}s (status: {status})")
+        time.sleep(poll_interval)
+
+
+def ensure_collection(client: QdrantClient, collection_name: str = COLLECTION_NAME, vector_size: int = 384) -> bool:
+    """Create the collection with the movie schema if it does not exist yet.
+    
+    Args:
+        client: Qdrant client instance.
+        collection_name: Name of collection to check or create.
+        vector_size: Dimensionality of embeddings (default 384 for MiniLM).
+        
+    Returns:
+        True if the collection was created, False if it (or an alias with
+        that name) already existed.
+    """
+    if resolve_alias(client, collection_name) is not None or client.collection_exists(collection_name):
+        return False
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=_vectors_config(vector_size),
+        sparse_vectors_config=_sparse_vectors_config(),
+    )
+    _create_payload_indexes(client, collection_name)
+    return True
+
+
+def scroll_points(
+    client: QdrantClient,
+    collection_name: str = COLLECTION_NAME,
+    scroll_filter: Optional[Filter] = None,
+    with_payload: Any = True,
+    with_vectors: Any = False,
+    page_size: int = 1000,
+) -> Iterator[Any]:
+    """Iterate over every point in a collection, one page at a time.
+    
+    Follows next_page_offset until the collection is exhausted, so callers
+    see the whole collection while holding only one page in memory.
+    
+    Args:
+        client: Qdrant client instance.
+        collection_name: Name of collection to scroll.
+        scroll_filter: Optional filter restricting the scrolled points.
+        with_payload: Payload selector passed to Qdrant (True, False or field list).
+        with_vectors: Vector selector passed to Qdrant.
+        page_size: Number of points fetched per request.
+        
+    Yields:
+        Qdrant Record objects.
+    """
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+        yield from points
+        if offset is None:
+            break
+
+
+def versioned_collection_name(base_name: str = COLLECTION_NAME) -> str:
+    """Return a new versioned collection name such as my_movies_v20240101120000123456_4821.
+    
+    The suffix is the UTC time down to the microsecond followed by four
+    random digits, so two ingests started at the same moment never pick the
+    same name, and names still sort by creation time.
+    
+    Args:
+        base_name: Logical collection name served through an alias.
+        
+    Returns:
+        New collection name.
+    """
+    now = time.time()
+    stamp = time.strftime("%Y%m%d%H%M%S", time.gmtime(now))
+    micros = int(now % 1 * 1_000_000)
+    return f"{base_name}_v{stamp}{micros:06d}_{secrets.randbelow(10_000):04d}"
+
+
+def resolve_alias(client: QdrantClient, alias_name: str) -> Optional[str]:
+    """Return the collection an alias points to, or None if there is no such alias."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+def collection_version(client: QdrantClient, collection_name: str) -> Tuple[str, Optional[int]]:
+    """Return (resolved collection, points count) of a collection or alias.
+
+    The value changes when an alias is repointed or points are added or
+    deleted, so in-process caches built from a scroll can tell when to
+    rebuild.
+    """
+    resolved = resolve_alias(client, collection_name) or collection_name
+    return resolved, client.get_collection(resolved).points_count
+
+
+def swap_alias(client: QdrantClient, alias_name: str, collection_name: str) -> Optional[str]:
+    """Atomically point an alias at a collection.
+    
+    The delete and create operations are sent in a single request, which
+    Qdrant applies atomically, so readers always see either the old or the
+    new collection.
+    
+    Args:
+        client: Qdrant client instance.
+        alias_name: Alias used by readers (e.g., my_movies).
+        collection_name: Collection the alias should point to.
+        
+    Returns:
+        The collection the alias pointed to before, or None.
+    """
+    previous = resolve_alias(client, alias_name)
+    operations: List[Any] = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+    operations.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name))
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+    return previous
+
+
+def list_collection_versions(client: QdrantClient, base_name: str = COLLECTION_NAME) -> List[str]:
+    """Return versioned collections for a base name, oldest first."""
+    pattern = re.compile(rf"^{re.escape(base_name)}_v\d+(_\d+)?$")
+    names = [c.name for c in client.get_collections().collections if pattern.match(c.name)]
+    return sorted(names)
+
+
+def garbage_collect_versions(client: QdrantClient, base_name: str = COLLECTION_NAME, keep: int = 2) -> List[str]:
+    """Delete old versioned collections, keeping the newest few and the live one.
+    
+    Args:
+        client: Qdrant client instance.
+        base_name: Logical collection name served through an alias.
+        keep: Number of most recent versions to keep (including the live one).
+        
+    Returns:
+        Names of the deleted collections.
+    """
+    live = resolve_alias(client, base_name)
+    versions = list_collection_versions(client, base_name)
+    keep_set = set(versions[-keep:]) if keep > 0 else set()
+    deleted: List[str] = []
+    for name in versions:
+        if name in keep_set or name == live:
+            continue
+        client.delete_collection(collection_name=name)
+        deleted.append(name)
+    return deleted
@@ -0,0 +1,185 @@
+"""Persistent, content-addressed cache of description embeddings.
+
+Embeddings are keyed by a hash of the normalized text and stored per model
+version, so re-running ingestion only encodes descriptions that changed.
+
+On disk, each model version owns a directory holding:
+    vectors.bin: Row-major float32/float16 matrix, memory-mapped for reads.
+    keys.bin: 16-byte BLAKE2b digest of the text behind each matrix row.
+    meta.json: Model identity, dimension and dtype (for humans and sanity checks).
+
+Rows are only ever appended. A row counts as present once its key is written,
+and keys are written after vectors, so an interrupted run leaves at most some
+unreferenced vector bytes that are truncated on the next open.
+
+Constants:
+    EMBEDDING_CACHE_DIR: Default cache root (override with the EMBEDDING_CACHE_DIR env var).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+
+_DIGEST_SIZE = 16
+_KEYS_FILE = "keys.bin"
+_VECTORS_FILE = "vectors.bin"
+_META_FILE = "meta.json"
+
+
+class EmbeddingDiskCache:
+    """Append-only embedding cache for one model version.
+
+    Attributes:
+        model_id: Model name and version the cached vectors were produced with.
+        dim: Embedding dimensionality.
+        dtype: Storage dtype ("float32" or "float16").
+        path: Directory holding the cache files.
+        hits: Number of lookups served from the cache since opening.
+        misses: Number of lookups that were not cached since opening.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        dim: int,
+        root: str = EMBEDDING_CACHE_DIR,
+        dtype: str = "float32",
+    ) -> None:
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16'")
+        self.model_id = model_id
+        self.dim = dim
+        self.dtype = dtype
+        self.path = os.path.join(root, _cache_dir_name(model_id, dim, dtype))
+        self.hits = 0
+        self.misses = 0
+        self._np_dtype = np.dtype(dtype)
+        self._row_bytes = dim * self._np_dtype.itemsize
+        self._index: Dict[bytes, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self._write_meta()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lookup(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Return cached embeddings for texts, with None for each miss.
+
+        Args:
+            texts: Texts whose embeddings are requested.
+
+        Returns:
+            List aligned with texts holding a vector or None.
+        """
+        with self._lock:
+            found: List[Optional[List[float]]] = []
+            for text in texts:
+                row = self._index.get(cache_key(text))
+                if row is None or self._matrix is None:
+                    self.misses += 1
+                    found.append(None)
+                    continue
+                self.hits += 1
+                found.append(self._matrix[row].astype(np.float32).tolist())
+            return found
+
+    def add(self, texts: Sequence[str], vectors: Iterable[Sequence[float]]) -> None:
+        """Append embeddings for texts that are not cached yet.
+
+        Args:
+            texts: Texts the vectors were computed from.
+            vectors: Embeddings aligned with texts.
+        """
+        with self._lock:
+            new_keys: List[bytes] = []
+            new_rows: List[Sequence[float]] = []
+            pending = set()
+            for text, vector in zip(texts, vectors):
+                key = cache_key(text)
+                if key in self._index or key in pending:
+                    continue
+                pending.add(key)
+                new_keys.append(key)
+                new_rows.append(vector)
+            if not new_keys:
+                return
+
+            matrix = np.asarray(new_rows, dtype=self._np_dtype).reshape(len(new_rows), self.dim)
+            with open(os.path.join(self.path, _VECTORS_FILE), "ab") as f:
+                f.write(matrix.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(os.path.join(self.path, _KEYS_FILE), "ab") as f:
+                f.write(b"".join(new_keys))
+
+            start = len(self._index)
+            for offset, key in enumerate(new_keys):
+                self._index[key] = start + offset
+            self._map(len(self._index))
+
+    def _write_meta(self) -> None:
+        meta_path = os.path.join(self.path, _META_FILE)
+        if os.path.exists(meta_path):
+            return
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"model_id": self.model_id, "dim": self.dim, "dtype": self.dtype}, f, indent=2)
+
+    def _load(self) -> None:
+        keys_path = os.path.join(self.path, _KEYS_FILE)
+        vectors_path = os.path.join(self.path, _VECTORS_FILE)
+        keys = b""
+        if os.path.exists(keys_path):
+            with open(keys_path, "rb") as f:
+                keys = f.read()
+        vector_bytes = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+
+        rows = min(len(keys) // _DIGEST_SIZE, vector_bytes // self._row_bytes)
+        # Drop anything past the last complete (key, vector) pair.
+        if len(keys) != rows * _DIGEST_SIZE:
+            with open(keys_path, "r+b") as f:
+                f.truncate(rows * _DIGEST_SIZE)
+        if vector_bytes != rows * self._row_bytes:
+            with open(vectors_path, "r+b") as f:
+                f.truncate(rows * self._row_bytes)
+
+        for row in range(rows):
+            self._index[keys[row * _DIGEST_SIZE:(row + 1) * _DIGEST_SIZE]] = row
+        self._map(rows)
+
+    def _map(self, rows: int) -> None:
+        if rows == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            os.path.join(self.path, _VECTORS_FILE),
+            dtype=self._np_dtype,
+            mode="r",
+            shape=(rows, self.dim),
+        )
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only edits keep the same cache key."""
+    return " ".join(text.split())
+
+
+def cache_key(text: str) -> bytes:
+    """Return the content address of a text."""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=_DIGEST_SIZE).digest()
+
+
+def _cache_dir_name(model_id: str, dim: int, dtype: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_id).strip("_")[:64]
+    digest = hashlib.blake2b(f"{model_id}|{dim}|{dtype}".encode("utf-8"), digest_size=6).hexdigest()
+    return f"{slug}-{dim}-{dtype}-{digest}"
@@ -4,15 +4,24 @@ This module provides utilities for embedding text using sentence transformers
 and managing token counts. It handles the loading of pre-trained models and 
 offers functions for converting text to embeddings and analyzing token usage.
 
+Loaded models are kept in a process-wide registry (see get_encoder) so that
+each model is loaded once and shared by every retrieval call.
+
 Constants:
     MODEL_NAME: The pre-trained sentence transformer model identifier.
     EMBEDDING_SIZE: Dimensionality of the generated embeddings (384 for MiniLM).
     TOKEN_LIMIT: Maximum tokens allowed per chunk (default 256).
+    QUERY_CACHE_MAX_ENTRIES: Default entry bound of the query embedding cache.
+    QUERY_CACHE_MAX_BYTES: Default vector memory bound of the query embedding cache.
 """
 from __future__ import annotations
 
+import threading
+import time
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sentence_transformers import SentenceTransformer
 from transformers import AutoTokenizer
@@ -20,6 +29,8 @@ from transformers import AutoTokenizer
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_SIZE = 384
 TOKEN_LIMIT = 256
+QUERY_CACHE_MAX_ENTRIES = 4096
+QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
 
 
 @dataclass
@@ -34,9 +45,17 @@ class EncoderBundle:
     tokenizer: AutoTokenizer
 
 
+_ENCODERS: Dict[str, EncoderBundle] = {}
+_ENCODER_LOCKS: Dict[str, threading.Lock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
 def load_encoder(model_name: str = MODEL_NAME) -> EncoderBundle:
     """Load a sentence transformer model and its tokenizer.
     
+    This always builds a fresh bundle. Use get_encoder() to share a single
+    warm instance across the process.
+    
     Args:
         model_name: HuggingFace model identifier. Defaults to all-MiniLM-L6-v2.
         
@@ -48,17 +67,108 @@ def load_encoder(model_name: str = MODEL_NAME) -> EncoderBundle:
     return EncoderBundle(model=model, tokenizer=tokenizer)
 
 
-def embed_texts(model: SentenceTransformer, texts: Iterable[str]) -> List[List[float]]:
+def get_encoder(model_name: str = MODEL_NAME) -> EncoderBundle:
+    """Return the process-wide encoder for a model, loading it on first use.
+    
+    Concurrent callers asking for the same model wait for a single load;
+    loads of different models do not block each other.
+    
+    Args:
+        model_name: HuggingFace model identifier. Defaults to all-MiniLM-L6-v2.
+        
+    Returns:
+        Shared EncoderBundle for the model.
+    """
+    bundle = _ENCODERS.get(model_name)
+    if bundle is not None:
+        return bundle
+
+    with _REGISTRY_LOCK:
+        model_lock = _ENCODER_LOCKS.setdefault(model_name, threading.Lock())
+
+    with model_lock:
+        bundle = _ENCODERS.get(model_name)
+        if bundle is None:
+            bundle = load_encoder(model_name)
+            with _REGISTRY_LOCK:
+                _ENCODERS[model_name] = bundle
+    return bundle
+
+
+def preload_encoders(model_names: Iterable[str] = (MODEL_NAME,)) -> None:
+    """Warm the registry so the first query does not pay the model load.
+    
+    Args:
+        model_names: Model identifiers to load.
+    """
+    for model_name in model_names:
+        get_encoder(model_name)
+
+
+def unload_encoder(model_name: str = MODEL_NAME) -> bool:
+    """Drop a model from the registry.
+    
+    Callers still holding the bundle keep it alive until they release it.
+    
+    Args:
+        model_name: Model identifier to unload.
+        
+    Returns:
+        True if the model was loaded, False otherwise.
+    """
+    with _REGISTRY_LOCK:
+        bundle = _ENCODERS.pop(model_name, None)
+    return bundle is not None
+
+
+def loaded_encoders() -> List[str]:
+    """Return the identifiers of all models currently held by the registry."""
+    with _REGISTRY_LOCK:
+        return list(_ENCODERS.keys())
+
+
+def encoder_memory_bytes(model_name: str | None = None) -> Dict[str, int]:
+    """Report the parameter and buffer memory held by loaded encoders.
+    
+    Args:
+        model_name: Restrict the report to one model. Defaults to all loaded models.
+        
+    Returns:
+        Mapping of model identifier to bytes used by its weights and buffers.
+    """
+    with _REGISTRY_LOCK:
+        if model_name is None:
+            bundles = dict(_ENCODERS)
+        elif model_name in _ENCODERS:
+            bundles = {model_name: _ENCODERS[model_name]}
+        else:
+            bundles = {}
+    return {name: _module_bytes(bundle.model) for name, bundle in bundles.items()}
+
+
+def _module_bytes(model: SentenceTransformer) -> int:
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def embed_texts(
+    model: SentenceTransformer,
+    texts: Iterable[str],
+    batch_size: int = 32,
+) -> List[List[float]]:
     """Generate normalized embeddings for multiple texts.
     
     Args:
         model: The sentence transformer model to use for encoding.
         texts: Iterable of text strings to embed.
+        batch_size: Number of texts per forward pass.
         
     Returns:
         List of embedding vectors (normalized to unit length).
     """
-    return model.encode(list(texts), normalize_embeddings=True).tolist()
+    return model.encode(list(texts), batch_size=batch_size, normalize_embeddings=True).tolist()
 
 
 def embed_text(model: SentenceTransformer, text: str) -> List[float]:
@@ -74,6 +184,188 @@ def embed_text(model: SentenceTransformer, text: str) -> List[float]:
     return model.encode(text, normalize_embeddings=True).tolist()
 
 
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings.
+    
+    Entries are keyed by (model name, normalized query text) and stored as
+    compact float32 arrays. The cache evicts least recently used entries once
+    either the entry count or the vector memory bound is exceeded, and drops
+    entries older than ttl_seconds when a TTL is set.
+    
+    Attributes:
+        max_entries: Maximum number of cached queries.
+        max_bytes: Maximum bytes of vector data held by the cache.
+        ttl_seconds: Entry lifetime in seconds, or None to keep entries until evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        max_bytes: int = QUERY_CACHE_MAX_BYTES,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[array, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a normalized query, if present."""
+        key = (model_name, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            vector, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return vector.tolist()
+
+    def put(self, model_name: str, text: str, vector: List[float]) -> None:
+        """Store an embedding and evict entries until the cache is within bounds."""
+        key = (model_name, text)
+        packed = array("f", vector)
+        size = len(packed) * packed.itemsize
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (packed, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return counters suitable for exporting as metrics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        vector, _ = self._entries.pop(key)
+        self._bytes -= len(vector) * vector.itemsize
+
+
+_QUERY_CACHE = QueryEmbeddingCache()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Return the process-wide query embedding cache."""
+    return _QUERY_CACHE
+
+
+def configure_query_cache(
+    max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+    max_bytes: int = QUERY_CACHE_MAX_BYTES,
+    ttl_seconds: Optional[float] = None,
+) -> QueryEmbeddingCache:
+    """Replace the process-wide query embedding cache with new bounds.
+    
+    Args:
+        max_entries: Maximum number of cached queries.
+        max_bytes: Maximum bytes of vector data held by the cache.
+        ttl_seconds: Entry lifetime in seconds, or None for no expiry.
+        
+    Returns:
+        The newly installed cache.
+    """
+    global _QUERY_CACHE
+    _QUERY_CACHE = QueryEmbeddingCache(max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+    return _QUERY_CACHE
+
+
+def normalize_query(text: str, tokenizer: AutoTokenizer | None = None) -> str:
+    """Normalize query text for cache lookups.
+    
+    Collapses whitespace, and lowercases when the model's tokenizer lowercases
+    anyway, so that trivially different spellings share one embedding.
+    
+    Args:
+        text: Raw query string.
+        tokenizer: Tokenizer of the model that will embed the query.
+        
+    Returns:
+        Normalized query string.
+    """
+    normalized = " ".join(text.split())
+    if tokenizer is not None and getattr(tokenizer, "do_lower_case", False):
+        normalized = normalized.lower()
+    return normalized
+
+
+def embed_query(query: str, model_name: str = MODEL_NAME) -> List[float]:
+    """Embed a query through the shared encoder and query embedding cache.
+    
+    Args:
+        query: Query string to embed.
+        model_name: Model identifier. Defaults to all-MiniLM-L6-v2.
+        
+    Returns:
+        Embedding vector (normalized to unit length).
+    """
+    encoder = get_encoder(model_name)
+    text = normalize_query(query, encoder.tokenizer)
+    cache = _QUERY_CACHE
+    vector = cache.get(model_name, text)
+    if vector is None:
+        vector = embed_text(encoder.model, text)
+        cache.put(model_name, text, vector)
+    return vector
+
+
+def embed_queries(queries: Iterable[str], model_name: str = MODEL_NAME) -> List[List[float]]:
+    """Embed many queries, encoding all cache misses in a single batch.
+    
+    Args:
+        queries: Query strings to embed.
+        model_name: Model identifier. Defaults to all-MiniLM-L6-v2.
+        
+    Returns:
+        Embedding vectors in input order (normalized to unit length).
+    """
+    encoder = get_encoder(model_name)
+    cache = _QUERY_CACHE
+    texts = [normalize_query(query, encoder.tokenizer) for query in queries]
+    vectors: List[Optional[List[float]]] = [cache.get(model_name, text) for text in texts]
+
+    missing = sorted({text for text, vector in zip(texts, vectors) if vector is None})
+    if missing:
+        encoded = dict(zip(missing, embed_texts(encoder.model, missing)))
+        for text, vector in encoded.items():
+            cache.put(model_name, text, vector)
+        vectors = [vector if vector is not None else encoded[text] for text, vector in zip(texts, vectors)]
+    return vectors  # type: ignore[return-value]
+
+
 def count_tokens(tokenizer: AutoTokenizer, text: str) -> int:
     """Count the number of tokens in a text string.
     
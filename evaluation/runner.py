@@ -9,9 +9,11 @@ from typing import Any, Dict, List
 if __package__ is None and __name__ == "__main__":
     sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from db.capabilities import capability_metrics
 from evaluation.ground_truth import GroundTruthQuery, get_ground_truth
 from evaluation.metrics import mrr, ndcg_at_k, precision_at_k, recall_at_k
 from evaluation.report import build_report, write_csv, write_json
+from embeddings.encoder import preload_encoders
 from retrieval import retrieve
 
 
@@ -56,6 +58,9 @@ def run_evaluation(
             )
 
     report = build_report(runs)
+    # Probe, failure and short-circuit counts of optional Qdrant features
+    # (e.g. how often the BM25 leg fell back to local scoring).
+    report["backend_events"] = capability_metrics()
     write_json(report, output_json)
     if output_csv:
         write_csv(runs, output_csv)
@@ -70,6 +75,8 @@ if __name__ == "__main__":
         "sparse_prefilter_dense_rank",
         "sparse_recall_dense_rerank",
         "hybrid_combined",
+        "hybrid_rrf",
+        "hybrid_server_fusion",
     ]
 
     PARAMS = {
@@ -88,8 +95,12 @@ if __name__ == "__main__":
             "fusion_alpha": 0.5,
             "fusion_beta": 0.5,
         },
+        "hybrid_rrf": {"dense_top_k": 40, "sparse_top_k": 40, "rrf_k": 60},
+        "hybrid_server_fusion": {"dense_top_k": 40, "sparse_top_k": 40, "fusion": "rrf"},
     }
 
+    # Load the encoder up front so the first query's latency is not skewed.
+    preload_encoders()
     run_evaluation(
         strategies=STRATEGIES,
         params_by_strategy=PARAMS,
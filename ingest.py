@@ -1,71 +1,623 @@
 """Data ingestion pipeline for loading movies into the Qdrant vector database.
 
 This module performs movie-level ingestion:
-1. Load movie data
+1. Stream movie data from a source (data/movies.py, JSONL, CSV or Parquet)
 2. Normalize payload fields
-3. Build sparse_text (BM25)
-4. Generate dense embeddings for descriptions
+3. Build sparse_text (BM25) and count collection-wide BM25 statistics
+4. Generate dense embeddings for descriptions in batches
 5. Store one point per movie in Qdrant
+
+The steps run as an overlapped pipeline connected by bounded queues, so the
+CPU keeps encoding while the network uploads:
+- parse: the calling thread validates movies and builds payloads
+- embed: a dedicated encoder thread batches payloads and embeds them
+- upload: I/O threads send upserts with a cap on in-flight batches
+Per-stage throughput and peak queue depth are printed in the summary to
+show which stage is the bottleneck.
+
+Modes:
+- "recreate": drop and rebuild the collection (default, clean experiments)
+- "upsert": overwrite points by deterministic id, keep everything else
+- "incremental": upsert only new or changed movies (by payload content_hash)
+  and delete points whose movie disappeared from the source
+- "blue_green": build a fresh versioned collection (e.g. my_movies_v<timestamp>),
+  atomically swap the collection_name alias to it, then drop old versions;
+  queries keep hitting the previous version until the swap
 """
 from __future__ import annotations
 
-from typing import Iterable, List, Tuple
+import argparse
+import hashlib
+import json
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
 from uuid import NAMESPACE_DNS, uuid5
 
-from qdrant_client.models import PointStruct
-
-from data.movies import movies
-from db.qdrant_client import COLLECTION_NAME, DENSE_VECTOR_NAME, get_client, recreate_collection
-from embeddings.encoder import EMBEDDING_SIZE, MODEL_NAME, embed_text, load_encoder
+from qdrant_client.models import PointIdsList, PointStruct
+
+from data.readers import SkippedRecord, iter_builtin_movies, open_movie_source
+from db.memory_store import invalidate_memory_store
+from db.qdrant_client import (
+    COLLECTION_NAME,
+    DENSE_VECTOR_NAME,
+    SPARSE_VECTOR_NAME,
+    ensure_collection,
+    finish_bulk_load,
+    garbage_collect_versions,
+    get_client,
+    recreate_collection,
+    resolve_alias,
+    restore_indexing,
+    scroll_points,
+    swap_alias,
+    versioned_collection_name,
+)
+from embeddings.disk_cache import EMBEDDING_CACHE_DIR, EmbeddingDiskCache
+from embeddings.encoder import EMBEDDING_SIZE, MODEL_NAME, embed_texts, get_encoder
+from sparse.bm25_index import invalidate_bm25_index, payload_terms, term_frequencies, tokenize
+from sparse.corpus_stats import STATS_PAYLOAD_FIELDS, CorpusStats, load_corpus_stats, save_corpus_stats
+from sparse.vectors import DEFAULT_AVGDL, document_sparse_vectors, needs_reweight, reweight_sparse_vectors
+
+INGEST_BATCH_SIZE = 256
+ENCODE_BATCH_SIZE = 32
+UPSERT_BATCH_SIZE = 256
+UPSERT_PARALLELISM = 4
+UPSERT_MAX_IN_FLIGHT = 8
+PIPELINE_QUEUE_SIZE = 4
+INGEST_MODES = ("recreate", "upsert", "incremental", "blue_green")
 
 
 def ingest_movies(
     collection_name: str = COLLECTION_NAME,
-    recreate: bool = True,
+    recreate: Optional[bool] = None,
+    *,
+    source: Optional[Iterable[dict]] = None,
+    mode: Optional[str] = None,
+    batch_size: int = INGEST_BATCH_SIZE,
+    encode_batch_size: int = ENCODE_BATCH_SIZE,
+    embedding_cache_dir: Optional[str] = EMBEDDING_CACHE_DIR,
+    upsert_batch_size: int = UPSERT_BATCH_SIZE,
+    upsert_parallelism: int = UPSERT_PARALLELISM,
+    max_in_flight: int = UPSERT_MAX_IN_FLIGHT,
+    skipped_report_path: Optional[str] = None,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    keep_versions: int = 2,
+    bulk_load: bool = True,
 ) -> Tuple[int, int]:
     """Ingest movie descriptions into Qdrant as one point per movie.
 
+    Movies are consumed lazily from source and flow through validation,
+    payload building, embedding and upsert one batch at a time, so the
+    catalog is never held in memory.
+
+    Validated movies are grouped into batches of batch_size and each batch
+    is embedded with a single encoder call. Descriptions already present in
+    the on-disk embedding cache for the current model version are not
+    re-encoded.
+
+    Every payload carries a content_hash of its fields and the embedding
+    model. In "incremental" mode the existing ids and hashes are fetched
+    from Qdrant up front; unchanged movies are neither embedded nor
+    upserted, and points whose movie is no longer in the source are deleted.
+    Invalid rows count as present when their name and year identify them; if
+    any invalid row cannot be identified, nothing is deleted in that run.
+
+    The stages run concurrently (see module docstring): payloads are built
+    in the calling thread, a dedicated encoder thread embeds batches,
+    and upserts run on upsert_parallelism I/O threads. Points are sent with
+    wait=False, at most max_in_flight upsert batches are outstanding, and
+    the final batch is sent with wait=True as a consistency barrier.
+
     Args:
-        collection_name: Qdrant collection name.
-        recreate: If True, recreate the collection before ingesting.
+        collection_name: Qdrant collection name (the alias name in "blue_green" mode).
+        recreate: Deprecated; use mode. True maps to mode="recreate", False to
+            mode="upsert" (ingest into the existing collection).
+        source: Iterable of raw movie dicts and SkippedRecord entries (see
+            data/readers.py). Defaults to the bundled data/movies.py catalog.
+        mode: One of "recreate" (default), "upsert", "incremental" or "blue_green"
+            (see module docstring).
+        batch_size: Number of movies embedded per encoder call.
+        encode_batch_size: Number of descriptions per model forward pass.
+        embedding_cache_dir: Root of the persistent embedding cache, or None to disable it.
+        upsert_batch_size: Number of points per upsert request.
+        upsert_parallelism: Number of threads sending upsert requests.
+        max_in_flight: Maximum number of upsert batches outstanding at once.
+        skipped_report_path: File that receives one line per skipped movie.
+            If None, skipped movies are printed as they are found.
+        queue_size: Capacity of the bounded queues between stages.
+        keep_versions: Versioned collections kept after a "blue_green" swap,
+            including the live one (older ones allow quick rollback).
+        bulk_load: For freshly built collections ("recreate", "blue_green"),
+            upload with HNSW and payload indexing disabled, then build the
+            indexes and wait for the optimizer to report green.
 
     Returns:
         Tuple of (total_points_upserted, total_movies_processed).
+
+    Raises:
+        ValueError: If mode is not a recognized ingest mode, both mode and
+            recreate are given, or "recreate" is used on a name that is
+            served through an alias.
     """
-    encoder = load_encoder(MODEL_NAME)
+    if recreate is not None:
+        if mode is not None:
+            raise ValueError("pass either mode or the deprecated recreate flag, not both")
+        warnings.warn(
+            "ingest_movies(recreate=...) is deprecated; use mode='recreate' or mode='upsert'",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        mode = "recreate" if recreate else "upsert"
+    if mode is None:
+        mode = "recreate"
+    if mode not in INGEST_MODES:
+        raise ValueError(f"mode must be one of {INGEST_MODES}")
+    if source is None:
+        source = iter_builtin_movies()
+
+    encoder = get_encoder(MODEL_NAME)
+    model_version = _get_model_version(encoder.model)
+    model_id = f"{MODEL_NAME}@{model_version or 'unknown'}"
+    cache: Optional[EmbeddingDiskCache] = None
+    if embedding_cache_dir:
+        cache = EmbeddingDiskCache(model_id=model_id, dim=EMBEDDING_SIZE, root=embedding_cache_dir)
 
     client = get_client()
 
-    if recreate:
-        recreate_collection(client, collection_name=collection_name, vector_size=EMBEDDING_SIZE)
-
-    points: List[PointStruct] = []
-    movies_skipped: List[str] = []
+    existing_hashes: Dict[str, Optional[str]] = {}
+    target_collection = collection_name
+    if mode == "recreate":
+        if resolve_alias(client, collection_name) is not None:
+            raise ValueError(
+                f"'{collection_name}' is an alias; use mode='blue_green' or 'incremental' to rebuild it"
+            )
+        recreate_collection(
+            client, collection_name=collection_name, vector_size=EMBEDDING_SIZE, bulk_load=bulk_load
+        )
+    elif mode == "blue_green":
+        target_collection = versioned_collection_name(collection_name)
+        if target_collection == resolve_alias(client, collection_name) or client.collection_exists(
+            target_collection
+        ):
+            # Never rebuild (and so drop) a collection that may be serving.
+            raise ValueError(f"collection '{target_collection}' already exists; refusing to overwrite it")
+        recreate_collection(
+            client, collection_name=target_collection, vector_size=EMBEDDING_SIZE, bulk_load=bulk_load
+        )
+    elif mode == "incremental":
+        if not ensure_collection(client, collection_name=collection_name, vector_size=EMBEDDING_SIZE):
+            existing_hashes = _fetch_content_hashes(client, collection_name)
+    with_sparse = mode in ("recreate", "blue_green") or _has_sparse_vector(client, collection_name)
+    if not with_sparse:
+        print(
+            f"Warning: collection '{collection_name}' has no '{SPARSE_VECTOR_NAME}' sparse vector; "
+            "upserting dense vectors only. Rebuild it with mode='blue_green' to enable Qdrant BM25."
+        )
+    bulk_loading = bulk_load and mode in ("recreate", "blue_green")
+
+    stages = {name: _StageStats(name) for name in ("parse", "embed", "upload")}
+    uploader = _PointUploader(
+        client,
+        target_collection,
+        batch_size=upsert_batch_size,
+        parallelism=upsert_parallelism,
+        max_in_flight=max_in_flight,
+        stats=stages["upload"],
+    )
+    embedder = _EmbedWorker(
+        encoder.model,
+        uploader,
+        batch_size=batch_size,
+        encode_batch_size=encode_batch_size,
+        cache=cache,
+        queue_size=queue_size,
+        stats=stages["embed"],
+        sparse_avgdl=_sparse_avgdl(collection_name),
+        with_sparse=with_sparse,
+    )
+    skipped = _SkippedMovieLog(skipped_report_path)
+    seen_ids: Set[str] = set()
+    # Ids of invalid rows: not upserted, but still present in the source.
+    skipped_ids: Set[str] = set()
+    unidentified_skips = 0
+    stale_ids: List[str] = []
+    corpus_stats = CorpusStats()
+    total_movies = 0
+    unchanged = 0
+
+    embedder.start()
+    try:
+        for chunk in _parse_stream(source, model_id, chunk_size=batch_size, stats=stages["parse"]):
+            for movie_name, point_id, payload, reason in chunk:
+                total_movies += 1
+                if payload is None:
+                    skipped.add(f"{movie_name}: {reason}")
+                    if point_id is None:
+                        unidentified_skips += 1
+                    else:
+                        skipped_ids.add(point_id)
+                    continue
+                if point_id in seen_ids:
+                    skipped.add(f"{movie_name}: duplicate id {point_id}")
+                    continue
+                seen_ids.add(point_id)
+                corpus_stats.add_document(payload["sparse_term_ids"], payload["sparse_doc_len"])
+                if existing_hashes.get(point_id) == payload["content_hash"]:
+                    unchanged += 1
+                    continue
+                embedder.put(payload)
+        embedder.finish()
+        uploader.close()
+        if unidentified_skips and existing_hashes:
+            # Any existing point could belong to a row we could not identify;
+            # deleting now could drop a movie over a transient bad record.
+            print(
+                f"Warning: {unidentified_skips} skipped movies could not be identified; "
+                "not deleting points missing from the source in this run."
+            )
+        else:
+            stale_ids = [
+                point_id for point_id in existing_hashes if point_id not in seen_ids and point_id not in skipped_ids
+            ]
+        if mode == "upsert":
+            # The source may cover only part of the collection; count all of it.
+            corpus_stats = CorpusStats.from_points(
+                scroll_points(client, collection_name, with_payload=STATS_PAYLOAD_FIELDS)
+            )
+        elif existing_hashes:
+            # Points kept without a valid source row still belong to the corpus.
+            stale = set(stale_ids)
+            kept_ids = [point_id for point_id in existing_hashes if point_id not in seen_ids and point_id not in stale]
+            if kept_ids:
+                for point in client.retrieve(
+                    collection_name=collection_name,
+                    ids=kept_ids,
+                    with_payload=STATS_PAYLOAD_FIELDS,
+                    with_vectors=False,
+                ):
+                    term_ids, _, doc_len = payload_terms(point.payload or {})
+                    corpus_stats.add_document(term_ids, doc_len)
+        if with_sparse:
+            corpus_stats.weights_avgdl = _settle_sparse_weights(
+                client, target_collection, embedder.sparse_avgdl, corpus_stats
+            )
+        if bulk_loading:
+            finish_bulk_load(client, target_collection)
+    except BaseException:
+        embedder.cancel()
+        uploader.abort()
+        if bulk_loading and mode == "recreate":
+            # The collection stays in place; do not leave it with HNSW and indexing disabled.
+            try:
+                restore_indexing(client, target_collection)
+            except Exception as exc:
+                print(f"Warning: could not restore indexing on '{target_collection}': {exc}")
+        if mode == "blue_green" and resolve_alias(client, collection_name) != target_collection:
+            # The half-built version was never served; do not leave it behind.
+            client.delete_collection(collection_name=target_collection)
+        raise
+    finally:
+        skipped.close()
+
+    if stale_ids:
+        client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=stale_ids),
+            wait=True,
+        )
 
+    if mode == "blue_green":
+        _promote_collection(client, collection_name, target_collection, keep_versions)
+
+    save_corpus_stats(collection_name, corpus_stats)
+    # Local BM25 and memory dense queries reload from the new contents.
+    invalidate_bm25_index(collection_name)
+    invalidate_memory_store(collection_name)
+
+    _log_ingestion_summary(
+        total_movies,
+        uploader.uploaded,
+        skipped,
+        model_version,
+        cache,
+        unchanged=unchanged if mode == "incremental" else None,
+        deleted=len(stale_ids) if mode == "incremental" else None,
+        deletion_skipped=bool(unidentified_skips and existing_hashes),
+        stages=list(stages.values()),
+    )
+    return uploader.uploaded, total_movies
+
+
+@dataclass
+class _StageStats:
+    """Throughput and queue-depth counters for one pipeline stage."""
+
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, items: int, seconds: float) -> None:
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+    def observe_depth(self, depth: int) -> None:
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def throughput(self) -> float:
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+
+def _parse_stream(
+    source: Iterable[dict],
+    model_id: str,
+    chunk_size: int,
+    stats: _StageStats,
+) -> Iterator[List[Tuple[str, Optional[str], Optional[dict], str]]]:
+    # Parsing is pure Python and would only contend for the GIL on extra
+    # threads; it runs in the calling thread while the encoder and upload
+    # threads (which release the GIL) work on earlier batches.
+    chunk: List[dict] = []
+    for movie in source:
+        chunk.append(movie)
+        if len(chunk) >= chunk_size:
+            yield _parse_chunk(chunk, model_id, stats)
+            chunk = []
+    if chunk:
+        yield _parse_chunk(chunk, model_id, stats)
+
+
+def _parse_chunk(
+    movies: List[dict],
+    model_id: str,
+    stats: _StageStats,
+) -> List[Tuple[str, Optional[str], Optional[dict], str]]:
+    started = time.perf_counter()
+    parsed: List[Tuple[str, Optional[str], Optional[dict], str]] = []
     for movie in movies:
+        if isinstance(movie, SkippedRecord):
+            # The reader could not decode this record; report where it is.
+            parsed.append((movie.location, None, None, movie.reason))
+            continue
         valid, reason = _validate_movie(movie)
         if not valid:
-            movies_skipped.append(f"{movie.get('name', '<unknown>')}: {reason}")
+            parsed.append((str(movie.get("name", "<unknown>")), _skipped_movie_id(movie), None, reason))
             continue
-
         payload = _build_payload(movie)
-        dense_vector = embed_text(encoder.model, payload["description"])
-        point_id = _movie_uuid(payload["name"], payload["year"])
-
-        points.append(
-            PointStruct(
-                id=point_id,
-                vector={DENSE_VECTOR_NAME: dense_vector},
-                payload=payload,
-            )
-        )
-
-    if points:
-        client.upsert(collection_name=collection_name, points=points, wait=True)
+        payload["content_hash"] = _content_hash(payload, model_id)
+        parsed.append((payload["name"], _movie_uuid(payload["name"], payload["year"]), payload, ""))
+    stats.record(len(movies), time.perf_counter() - started)
+    return parsed
+
+
+_STOP = object()
+
+
+class _EmbedWorker(threading.Thread):
+    """Dedicated encoder thread: batches payloads, embeds them, hands points to the uploader."""
+
+    def __init__(
+        self,
+        model,
+        uploader: "_PointUploader",
+        batch_size: int,
+        encode_batch_size: int,
+        cache: Optional[EmbeddingDiskCache],
+        queue_size: int,
+        stats: _StageStats,
+        sparse_avgdl: float = DEFAULT_AVGDL,
+        with_sparse: bool = True,
+    ) -> None:
+        super().__init__(name="embed", daemon=True)
+        self.model = model
+        self.uploader = uploader
+        self.batch_size = max(1, batch_size)
+        self.encode_batch_size = encode_batch_size
+        self.cache = cache
+        self.sparse_avgdl = sparse_avgdl
+        self.with_sparse = with_sparse
+        self.stats = stats
+        self.error: Optional[BaseException] = None
+        # Bounded in payloads: queue_size batches may wait for the encoder.
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size) * self.batch_size)
+        self._cancelled = threading.Event()
+
+    def put(self, payload: dict) -> None:
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self._queue.put(payload, timeout=0.1)
+            except queue.Full:
+                continue
+            self.stats.observe_depth(self._queue.qsize())
+            return
+
+    def finish(self) -> None:
+        self.put(_STOP)  # type: ignore[arg-type]
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        self.join(timeout=5.0)
+
+    def run(self) -> None:
+        try:
+            stopping = False
+            while not stopping and not self._cancelled.is_set():
+                batch: List[dict] = []
+                while len(batch) < self.batch_size:
+                    item = self._queue.get()
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                if not batch or self._cancelled.is_set():
+                    continue
+                started = time.perf_counter()
+                points = _embed_batch(
+                    self.model, batch, self.encode_batch_size, self.cache, self.sparse_avgdl, self.with_sparse
+                )
+                self.stats.record(len(batch), time.perf_counter() - started)
+                self.uploader.add(points)
+        except BaseException as exc:
+            self.error = exc
+
+
+class _SkippedMovieLog:
+    """Streams skipped-movie reasons to a report file (or stdout) and counts them."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.count = 0
+        self._file: Optional[TextIO] = open(path, "w", encoding="utf-8") if path else None
+
+    def add(self, item: str) -> None:
+        self.count += 1
+        if self._file is not None:
+            self._file.write(item + "\n")
+        else:
+            print(f"Skipped movie: {item}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _PointUploader:
+    """Streams points to Qdrant in fixed-size, parallel, non-blocking upserts.
+
+    add() returns once a batch is handed to the thread pool, and blocks only
+    while max_in_flight batches are outstanding. The most recent full batch
+    is held back so that close() can send it with wait=True after every
+    earlier request has been acknowledged. Qdrant applies acknowledged
+    updates in order, so once that request returns, all points are visible.
+    """
 
-    model_version = _get_model_version(encoder.model)
-    _log_ingestion_summary(len(movies), len(points), movies_skipped, model_version)
-    return len(points), len(movies)
+    def __init__(
+        self,
+        client,
+        collection_name: str,
+        batch_size: int,
+        parallelism: int,
+        max_in_flight: int,
+        stats: Optional[_StageStats] = None,
+    ) -> None:
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = max(1, batch_size)
+        self.uploaded = 0
+        self.stats = stats or _StageStats("upload")
+        self._executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="upsert")
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._futures: Set[Future] = set()
+        self._futures_lock = threading.Lock()
+        self._buffer: List[PointStruct] = []
+        self._held: List[PointStruct] = []
+
+    def add(self, points: Iterable[PointStruct]) -> None:
+        for point in points:
+            self._buffer.append(point)
+            if len(self._buffer) >= self.batch_size:
+                if self._held:
+                    self._submit(self._held)
+                self._held = self._buffer
+                self._buffer = []
+
+    def close(self) -> None:
+        final = self._buffer
+        if not final:
+            final, self._held = self._held, []
+        if self._held:
+            self._submit(self._held)
+        self._buffer, self._held = [], []
+
+        try:
+            self._drain()
+            if final:
+                self._upsert(final, wait=True)
+                self.uploaded += len(final)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def abort(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, batch: List[PointStruct]) -> None:
+        self._raise_failures()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._upsert, batch, False)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._futures_lock:
+            self._futures.add(future)
+            self.stats.observe_depth(len(self._futures))
+        future.add_done_callback(self._release)
+        self.uploaded += len(batch)
+
+    def _upsert(self, batch: List[PointStruct], wait: bool) -> None:
+        started = time.perf_counter()
+        self.client.upsert(collection_name=self.collection_name, points=batch, wait=wait)
+        self.stats.record(len(batch), time.perf_counter() - started)
+
+    def _release(self, future: Future) -> None:
+        self._slots.release()
+        if future.exception() is None:
+            with self._futures_lock:
+                self._futures.discard(future)
+
+    def _raise_failures(self) -> None:
+        with self._futures_lock:
+            failed = [f for f in self._futures if f.done() and f.exception() is not None]
+        if failed:
+            raise failed[0].exception()  # type: ignore[misc]
+
+    def _drain(self) -> None:
+        with self._futures_lock:
+            pending = list(self._futures)
+        for future in pending:
+            future.result()
+
+
+def _promote_collection(client, alias_name: str, collection_name: str, keep_versions: int) -> None:
+    if resolve_alias(client, alias_name) is None and client.collection_exists(alias_name):
+        # One-time migration: a plain collection still owns the alias name.
+        print(f"Replacing plain collection '{alias_name}' with an alias (brief downtime).")
+        client.delete_collection(collection_name=alias_name)
+    previous = swap_alias(client, alias_name, collection_name)
+    print(f"Alias '{alias_name}' -> '{collection_name}' (was: {previous or 'none'})")
+    for name in garbage_collect_versions(client, alias_name, keep=keep_versions):
+        print(f"Dropped old collection version '{name}'")
+
+
+def _fetch_content_hashes(client, collection_name: str) -> Dict[str, Optional[str]]:
+    hashes: Dict[str, Optional[str]] = {}
+    for record in scroll_points(client, collection_name, with_payload=["content_hash"]):
+        hashes[str(record.id)] = (record.payload or {}).get("content_hash")
+    return hashes
+
+
+def _content_hash(payload: dict, model_id: str) -> str:
+    # The model identity is part of the hash so a model change re-embeds every movie.
+    content = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(f"{model_id}|{content}".encode("utf-8"), digest_size=16).hexdigest()
 
 
 def _validate_movie(movie: dict) -> Tuple[bool, str]:
@@ -114,6 +666,15 @@ def _movie_uuid(name: str, year: int) -> str:
     return str(uuid5(NAMESPACE_DNS, f"{name}|{year}"))
 
 
+def _skipped_movie_id(movie: dict) -> Optional[str]:
+    # Identify an invalid row when its name and year are usable, so that
+    # incremental mode keeps the movie's existing point instead of deleting it.
+    name, year = movie.get("name"), movie.get("year")
+    if isinstance(name, str) and name.strip() and isinstance(year, int) and not isinstance(year, bool):
+        return _movie_uuid(name.strip(), year)
+    return None
+
+
 def _build_payload(movie: dict) -> dict:
     name = movie["name"].strip()
     description = movie["description"].strip()
@@ -134,9 +695,85 @@ def _build_payload(movie: dict) -> dict:
         "themes_norm": [t.lower() for t in themes],
         "sparse_text": _build_sparse_text(name, director, cast, themes),
     }
+    tokens = tokenize(payload["sparse_text"])
+    payload["sparse_term_ids"], payload["sparse_term_tfs"] = term_frequencies(tokens)
+    payload["sparse_doc_len"] = len(tokens)
     return payload
 
 
+def _embed_batch(
+    model,
+    payloads: List[dict],
+    encode_batch_size: int,
+    cache: Optional[EmbeddingDiskCache] = None,
+    sparse_avgdl: float = DEFAULT_AVGDL,
+    with_sparse: bool = True,
+) -> List[PointStruct]:
+    descriptions = [payload["description"] for payload in payloads]
+    vectors: List[Optional[List[float]]] = (
+        cache.lookup(descriptions) if cache is not None else [None] * len(payloads)
+    )
+
+    # Encode the misses longest-first so every forward pass pads to similar
+    # lengths, then scatter the vectors back to their payloads.
+    misses = sorted(
+        (i for i, vector in enumerate(vectors) if vector is None),
+        key=lambda i: len(descriptions[i]),
+        reverse=True,
+    )
+    if misses:
+        encoded = embed_texts(model, [descriptions[i] for i in misses], batch_size=encode_batch_size)
+        for index, dense_vector in zip(misses, encoded):
+            vectors[index] = dense_vector
+        if cache is not None:
+            cache.add([descriptions[i] for i in misses], encoded)
+
+    sparse_vectors = document_sparse_vectors(payloads, avgdl=sparse_avgdl) if with_sparse else None
+    points: List[PointStruct] = []
+    for i, (payload, dense_vector) in enumerate(zip(payloads, vectors)):
+        vector = {DENSE_VECTOR_NAME: dense_vector}
+        if sparse_vectors is not None:
+            vector[SPARSE_VECTOR_NAME] = sparse_vectors[i]
+        points.append(
+            PointStruct(
+                id=_movie_uuid(payload["name"], payload["year"]),
+                vector=vector,
+                payload=payload,
+            )
+        )
+    return points
+
+
+def _has_sparse_vector(client, collection_name: str) -> bool:
+    # Collections created before the bm25 vector existed keep their schema
+    # until they are rebuilt; upserting a sparse vector into them fails.
+    sparse_vectors = client.get_collection(collection_name).config.params.sparse_vectors or {}
+    return SPARSE_VECTOR_NAME in sparse_vectors
+
+
+def _sparse_avgdl(collection_name: str) -> float:
+    # Weights are written while streaming, before this run's avgdl is known.
+    # Match the avgdl of the weights already stored (so an upsert stays
+    # consistent with the points it does not touch); _settle_sparse_weights
+    # corrects it afterwards if this run moved the average.
+    stats = load_corpus_stats(collection_name)
+    if stats is None or not stats.n_docs:
+        return DEFAULT_AVGDL
+    return stats.weights_avgdl if stats.weights_avgdl is not None else stats.avgdl
+
+
+def _settle_sparse_weights(client, collection_name: str, written_avgdl: float, corpus_stats: CorpusStats) -> float:
+    # Return the avgdl the collection's weights use once this returns.
+    if not corpus_stats.n_docs or not needs_reweight(written_avgdl, corpus_stats.avgdl):
+        return written_avgdl
+    rewritten = reweight_sparse_vectors(client, collection_name, corpus_stats.avgdl)
+    print(
+        f"Re-weighted BM25 vectors of {rewritten} points for avgdl {corpus_stats.avgdl:.2f} "
+        f"(written with {written_avgdl:.2f})"
+    )
+    return corpus_stats.avgdl
+
+
 def _get_model_version(model) -> str | None:
     candidates: List[str | None] = [
         getattr(model, "model_name_or_path", None),
@@ -157,22 +794,59 @@ def _get_model_version(model) -> str | None:
 def _log_ingestion_summary(
     total_movies: int,
     total_points: int,
-    skipped: List[str],
+    skipped: _SkippedMovieLog,
     model_version: str | None,
+    cache: Optional[EmbeddingDiskCache] = None,
+    unchanged: Optional[int] = None,
+    deleted: Optional[int] = None,
+    deletion_skipped: bool = False,
+    stages: Optional[List[_StageStats]] = None,
 ) -> None:
     print(f"Ingestion summary:")
     print(f"- total_movies_seen: {total_movies}")
     print(f"- total_points_upserted: {total_points}")
-    print(f"- movies_skipped: {len(skipped)}")
-    if skipped:
-        for item in skipped:
-            print(f"  - {item}")
+    if unchanged is not None:
+        print(f"- movies_unchanged: {unchanged}")
+    if deleted is not None:
+        print(f"- points_deleted: {deleted}")
+        if deletion_skipped:
+            print("  - stale point deletion skipped: some skipped movies could not be identified")
+    print(f"- movies_skipped: {skipped.count}")
+    if skipped.count and skipped.path:
+        print(f"  - details: {skipped.path}")
     print(f"- embedding_model: {MODEL_NAME}")
     if model_version:
         print(f"- embedding_model_version: {model_version}")
     print(f"- embedding_dim: {EMBEDDING_SIZE}")
+    if cache is not None:
+        print(f"- embedding_cache_hits: {cache.hits}")
+        print(f"- embedding_cache_misses: {cache.misses}")
+        print(f"- embedding_cache_path: {cache.path}")
+    for stage in stages or []:
+        print(
+            f"- stage_{stage.name}: {stage.items} items, "
+            f"{stage.throughput():.1f} items/s busy, "
+            f"{stage.busy_seconds:.2f}s busy, "
+            f"max_queue_depth={stage.max_queue_depth}"
+        )
 
 
 if __name__ == "__main__":
-    total_points, total_movies = ingest_movies()
+    parser = argparse.ArgumentParser(description="Ingest movies into Qdrant.")
+    parser.add_argument(
+        "source",
+        nargs="?",
+        help="Movie source (.jsonl, .csv or .parquet). Defaults to data/movies.py.",
+    )
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Qdrant collection name.")
+    parser.add_argument("--mode", choices=INGEST_MODES, default="recreate", help="Ingest mode.")
+    parser.add_argument("--skipped-report", help="Write skipped movies to this file.")
+    args = parser.parse_args()
+
+    total_points, total_movies = ingest_movies(
+        source=open_movie_source(args.source) if args.source else None,
+        collection_name=args.collection,
+        mode=args.mode,
+        skipped_report_path=args.skipped_report,
+    )
     print(f"Ingested {total_movies} movies -> {total_points} points")
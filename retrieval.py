@@ -1,31 +1,106 @@
-"""Retrieval pipelines for movie recommendations (baseline: dense-only).
-
-This module provides a unified retrieve() entry point and implements the
-dense-only baseline strategy. Other strategies will be added incrementally.
+"""Retrieval pipelines for movie recommendations.
+
+retrieve() runs one query and retrieve_many() runs a list of queries with
+batched encoding and first-stage searches. Both look the strategy name up in
+the _STRATEGIES dispatch table, build a RetrievalContext that the stages
+share, and call the handler:
+- dense_only: cosine search on the dense description vector
+- sparse_only: BM25 search on sparse_text fields
+- dense_recall_sparse_rerank: dense candidates reranked by BM25 with
+  collection-wide statistics
+- sparse_prefilter_dense_rank: BM25 candidates ranked by dense similarity
+- sparse_recall_dense_rerank: BM25 candidates reranked by a blend of both scores
+- hybrid_combined: parallel dense and BM25 legs, normalized scores fused by weight
+- hybrid_rrf: parallel legs fused by reciprocal rank
+- hybrid_server_fusion: prefetch legs fused by Qdrant (RRF or DBSF) in one request
+
+params select the backends. bm25_backend is "qdrant" (stored bm25 sparse
+vector, the default), "local" (in-process inverted index) or "scan" (streaming
+scroll). dense_backend is "qdrant" or "memory" (in-process vector matrix). A
+Qdrant BM25 leg falls back to the local index while the collection lacks the
+sparse vector or its circuit breaker is open. retrieval_async.py provides the
+asyncio counterpart.
+
+Constants:
+    QUERY_BATCH_SIZE: Maximum searches per query_batch_points call in retrieve_many().
+    RESULT_PAYLOAD_FIELDS: Payload fields read by result formatting and explanations.
+    PAYLOAD_SELECTORS: Payload selector sent by each retrieval stage.
+    VECTOR_SELECTORS: Stored vectors fetched by each retrieval stage.
+    MEMORY_PAYLOAD_FIELDS: Payload fields kept by the memory dense store.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import heapq
 import math
-import re
+import threading
+import warnings
+
+import numpy as np
 
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import (
-    Bm25Config,
-    Document,
     FieldCondition,
     Filter,
-    HasIdCondition,
-    Language,
+    Fusion,
+    FusionQuery,
     MatchAny,
     MatchValue,
+    Prefetch,
+    QueryRequest,
     Range,
-    TokenizerType,
+    ScoredPoint,
+    SparseVector,
 )
 
-from db.qdrant_client import COLLECTION_NAME, DENSE_VECTOR_NAME, get_client
-from embeddings.encoder import MODEL_NAME, embed_text, load_encoder
+from db.capabilities import (
+    BM25_SPARSE_VECTOR,
+    capability_available,
+    record_capability_failure,
+    record_capability_success,
+)
+from db.memory_store import MemoryDenseStore, get_memory_store
+from db.qdrant_client import COLLECTION_NAME, DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME, get_client
+from embeddings.encoder import MODEL_NAME, embed_queries, embed_query
+from sparse.bm25_index import INDEX_PAYLOAD_FIELDS, get_bm25_index, payload_terms, tokenize
+from sparse.bm25_scan import scan_bm25
+from sparse.corpus_stats import STATS_PAYLOAD_FIELDS, get_corpus_stats
+from sparse.vectors import BM25_B, BM25_K1, query_sparse_vector
+
+QUERY_BATCH_SIZE = 64
+
+# Fields read when formatting results and match explanations.
+RESULT_PAYLOAD_FIELDS = list(INDEX_PAYLOAD_FIELDS)
+
+# Payload selector per stage (False, an include list or a Qdrant
+# PayloadSelectorExclude). No stage ships descriptions or sparse_text.
+# "ids" candidate pools carry ids and scores only; their display fields are
+# filled in locally from the memory dense store. "rescore" pools keep the
+# display fields: they already carry dense vectors, and fetching the fields
+# of the final top k would cost another round trip.
+PAYLOAD_SELECTORS: Dict[str, Any] = {
+    "ids": False,
+    "results": RESULT_PAYLOAD_FIELDS,
+    "rerank": RESULT_PAYLOAD_FIELDS + STATS_PAYLOAD_FIELDS,
+    "rescore": RESULT_PAYLOAD_FIELDS,
+}
+
+# Stored vectors fetched per stage (stages not listed fetch none). Two-stage
+# sparse -> dense strategies rescore candidates locally with these vectors
+# instead of a second, id-filtered dense search.
+VECTOR_SELECTORS: Dict[str, Any] = {
+    "rescore": [DENSE_VECTOR_NAME],
+}
+
+# Payload fields kept by the in-process dense store (dense_backend="memory").
+MEMORY_PAYLOAD_FIELDS = RESULT_PAYLOAD_FIELDS + STATS_PAYLOAD_FIELDS
+
+_LEG_EXECUTOR: ThreadPoolExecutor | None = None
+_LEG_EXECUTOR_LOCK = threading.Lock()
 
 
 def retrieve(
@@ -39,7 +114,7 @@ def retrieve(
 
     Args:
         query: Natural language query string.
-        strategy: Retrieval strategy name (currently supports "dense_only").
+        strategy: Retrieval strategy name (e.g., "dense_only", "hybrid_combined").
         params: Strategy-specific parameters (e.g., dense_top_k).
         filters: Hard filters (year range, director, cast, themes).
         collection_name: Qdrant collection to search.
@@ -50,46 +125,297 @@ def retrieve(
     """
     if params is None:
         params = {}
-    if strategy == "dense_only":
-        return _retrieve_dense_only(query, params, filters, collection_name)
-    if strategy == "sparse_only":
-        return _retrieve_sparse_only(query, params, filters, collection_name)
-    if strategy == "dense_recall_sparse_rerank":
-        return _retrieve_dense_recall_sparse_rerank(query, params, filters, collection_name)
-    if strategy == "sparse_prefilter_dense_rank":
-        return _retrieve_sparse_prefilter_dense_rank(query, params, filters, collection_name)
-    if strategy == "sparse_recall_dense_rerank":
-        return _retrieve_sparse_recall_dense_rerank(query, params, filters, collection_name)
-    if strategy == "hybrid_combined":
-        return _retrieve_hybrid_combined(query, params, filters, collection_name)
-    raise ValueError(f"Unsupported strategy: {strategy}")
+    handler = _STRATEGIES.get(strategy)
+    if handler is None:
+        raise ValueError(f"Unsupported strategy: {strategy}")
+    _check_bm25_params(strategy, params)
+    ctx = RetrievalContext(query=query, filters=filters, collection_name=collection_name)
+    return handler(ctx, params)
+
+
+def retrieve_many(
+    queries: Sequence[str],
+    strategy: str,
+    params: Optional[Dict[str, Any]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    collection_name: str = COLLECTION_NAME,
+    batch_size: int = QUERY_BATCH_SIZE,
+) -> List[List[Dict[str, Any]]]:
+    """Run one strategy over many queries with batched encoding and search.
+
+    All query vectors are computed with a single embed_texts call (through
+    the query embedding cache), and the strategy's first-stage dense and
+    BM25 searches are sent with query_batch_points, batch_size requests per
+    round trip. Later stages run per query on the prefetched hits.
+
+    Args:
+        queries: Natural language query strings.
+        strategy: Retrieval strategy name (same as retrieve()).
+        params: Strategy-specific parameters shared by all queries.
+        filters: Hard filters shared by all queries.
+        collection_name: Qdrant collection to search.
+        batch_size: Maximum number of searches per query_batch_points call.
+
+    Returns:
+        One ranked result list per query, in input order.
+    """
+    if params is None:
+        params = {}
+    handler = _STRATEGIES.get(strategy)
+    if handler is None:
+        raise ValueError(f"Unsupported strategy: {strategy}")
+    _check_bm25_params(strategy, params)
+
+    contexts = [RetrievalContext(query=q, filters=filters, collection_name=collection_name) for q in queries]
+    if not contexts:
+        return []
+
+    legs = _STRATEGY_LEGS.get(strategy, lambda _: [])(params)
+    if any(leg[0] in ("sparse", "fusion") for leg in legs) and not capability_available(
+        BM25_SPARSE_VECTOR, collection_name
+    ):
+        # Without Qdrant BM25, server fusion falls back to client-side fusion,
+        # whose dense leg can still be batched.
+        legs = [_dense_leg(params, 50) if leg[0] == "fusion" else leg for leg in legs if leg[0] != "sparse"]
+    if strategy in _QUERY_VECTOR_STRATEGIES:
+        vectors = embed_queries([ctx.query for ctx in contexts], MODEL_NAME)
+        for ctx, vector in zip(contexts, vectors):
+            ctx.query_vector = vector
+    for leg in legs:
+        if leg[0] == "dense" and params.get("dense_backend", "qdrant") == "memory":
+            _prefetch_memory_leg(contexts, leg)
+        else:
+            _prefetch_leg(contexts, leg, batch_size)
+
+    return [handler(ctx, params) for ctx in contexts]
+
+
+@dataclass
+class RetrievalContext:
+    """Per-request state shared by every stage of a retrieval strategy.
+
+    The query vector, BM25 query tokens and sparse vector, and compiled
+    Qdrant filter are computed on first access and reused by later stages,
+    so composite strategies never encode, tokenize or build filters twice.
+
+    Attributes:
+        query: Natural language query string.
+        filters: Hard filters (year range, director, cast, themes).
+        collection_name: Qdrant collection to search.
+        model_name: Embedding model used for the query vector.
+        prefetched: First-stage Qdrant hits fetched ahead of time (by
+            retrieve_many), keyed by leg; stages use them instead of querying.
+        dense_vectors: Stored dense vectors of hits fetched with vectors,
+            keyed by point id; used to rescore candidates locally.
+    """
+
+    query: str
+    filters: Optional[Dict[str, Any]] = None
+    collection_name: str = COLLECTION_NAME
+    model_name: str = MODEL_NAME
+    prefetched: Dict[Tuple[Any, ...], List[Any]] = field(default_factory=dict)
+    dense_vectors: Dict[str, List[float]] = field(default_factory=dict)
+
+    @cached_property
+    def query_vector(self) -> List[float]:
+        return embed_query(self.query, self.model_name)
+
+    @cached_property
+    def query_tokens(self) -> List[str]:
+        return tokenize(self.query)
+
+    @cached_property
+    def query_sparse_vector(self) -> SparseVector:
+        return query_sparse_vector(self.query_tokens)
+
+    @cached_property
+    def query_filter(self) -> Optional[Filter]:
+        return _build_filter(self.filters)
 
 
 def _retrieve_dense_only(
-    query: str,
+    ctx: RetrievalContext,
     params: Dict[str, Any],
-    filters: Optional[Dict[str, Any]],
-    collection_name: str,
 ) -> List[Dict[str, Any]]:
     dense_top_k = int(params.get("dense_top_k", 10))
-    query_filter = _build_filter(filters)
+    backend = params.get("dense_backend", "qdrant")
+    return _format_dense_results(ctx, _dense_points(ctx, dense_top_k, "results", backend))
 
-    encoder = load_encoder(MODEL_NAME)
-    query_vector = embed_text(encoder.model, query)
 
-    client = get_client()
-    response = client.query_points(
-        collection_name=collection_name,
-        query=query_vector,
-        using=DENSE_VECTOR_NAME,
-        query_filter=query_filter,
-        limit=dense_top_k,
-        with_payload=True,
-        with_vectors=False,
-    )
+def _retrieve_sparse_only(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    return _format_bm25_hits(ctx, _sparse_hits(ctx, params, "results"))
+
+
+def _sparse_hits(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+    stage: str,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    sparse_top_k = int(params.get("sparse_top_k", 10))
+    bm25_k1 = float(params.get("bm25_k1", 1.2))
+    bm25_b = float(params.get("bm25_b", 0.75))
+    backend = params.get("bm25_backend", "qdrant")
+
+    if backend == "qdrant":
+        if not ctx.query_tokens:
+            return []
+        # Collections without the bm25 sparse vector (or a failing server) go
+        # straight to local scoring until the capability is re-probed.
+        if capability_available(BM25_SPARSE_VECTOR, ctx.collection_name):
+            try:
+                points = _qdrant_bm25_points(ctx, sparse_top_k, stage)
+            except (UnexpectedResponse, ValueError):
+                record_capability_failure(BM25_SPARSE_VECTOR, ctx.collection_name)
+            else:
+                record_capability_success(BM25_SPARSE_VECTOR, ctx.collection_name)
+                _remember_dense_vectors(ctx, points)
+                return _point_hits(points)
+
+    if backend == "scan":
+        return _scan_bm25_hits(ctx, sparse_top_k, bm25_k1, bm25_b)
+    return _local_bm25_hits(ctx, sparse_top_k, bm25_k1, bm25_b)
+
+
+def _retrieve_dense_recall_sparse_rerank(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_top_k = int(params.get("dense_top_k", 50))
+    backend = params.get("dense_backend", "qdrant")
+    return _rerank_dense_candidates(ctx, _dense_points(ctx, dense_top_k, "rerank", backend), params)
+
+
+def _retrieve_sparse_prefilter_dense_rank(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    stage = _rescore_stage(params)
+    hits = _memory_payload_hits(ctx, _sparse_hits(ctx, _sparse_leg_params(params, 50), stage), stage)
+    if not hits:
+        return []
+
+    candidate_ids = [point_id for point_id, _, _ in hits]
+    _fetch_dense_vectors(ctx, _missing_dense_vectors(ctx, candidate_ids), params.get("dense_backend", "qdrant"))
+    return _rank_sparse_prefilter(ctx, hits, _cosine_scores(ctx, candidate_ids), params)
+
+
+def _retrieve_sparse_recall_dense_rerank(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    stage = _rescore_stage(params)
+    hits = _memory_payload_hits(ctx, _sparse_hits(ctx, _sparse_leg_params(params, 50), stage), stage)
+    sparse_results = _format_bm25_hits(ctx, hits)
+    if not sparse_results:
+        return []
+
+    candidates = _sparse_recall_candidates(sparse_results, params)
+    candidate_ids = [r["id"] for r in candidates]
+    _fetch_dense_vectors(ctx, _missing_dense_vectors(ctx, candidate_ids), params.get("dense_backend", "qdrant"))
+    return _rerank_sparse_candidates(ctx, candidates, _cosine_scores(ctx, candidate_ids), params)
+
+
+def _retrieve_hybrid_combined(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_results = _retrieve_dense_only(ctx, _dense_leg_params(params, 50))
+    sparse_results = _retrieve_sparse_only(ctx, _sparse_leg_params(params, 50))
+    return _fuse_hybrid_combined(ctx, dense_results, sparse_results, params)
+
+
+def _retrieve_hybrid_server_fusion(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    _server_fusion(params)
+    if (
+        params.get("bm25_backend", "qdrant") != "qdrant"
+        or params.get("dense_backend", "qdrant") != "qdrant"
+        or not capability_available(BM25_SPARSE_VECTOR, ctx.collection_name)
+    ):
+        # Server-side fusion needs both legs to run inside Qdrant.
+        return _retrieve_hybrid_combined(ctx, params)
+
+    points = ctx.prefetched.get(_fusion_leg(params))
+    if points is None:
+        try:
+            points = get_client().query_points(**_server_fusion_args(ctx, params)).points
+        except (UnexpectedResponse, ValueError):
+            # Fall back to client-side fusion if Qdrant BM25 is unavailable
+            record_capability_failure(BM25_SPARSE_VECTOR, ctx.collection_name)
+            return _retrieve_hybrid_combined(ctx, params)
+        record_capability_success(BM25_SPARSE_VECTOR, ctx.collection_name)
+    return _format_server_fusion_results(ctx, points, params)
+
+
+def _retrieve_hybrid_rrf(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    # Build the filter up front so both legs read the cached value.
+    _ = ctx.query_filter
+    executor = _leg_executor()
+    dense_future = executor.submit(_retrieve_dense_only, ctx, _dense_leg_params(params, 50))
+    sparse_future = executor.submit(_retrieve_sparse_only, ctx, _sparse_leg_params(params, 50))
+    return _fuse_rrf(ctx, dense_future.result(), sparse_future.result(), params)
+
+
+_SERVER_FUSIONS = {"rrf": Fusion.RRF, "dbsf": Fusion.DBSF}
+
+
+def _server_fusion(params: Dict[str, Any]) -> Fusion:
+    fusion = params.get("fusion", "rrf")
+    method = _SERVER_FUSIONS.get(fusion)
+    if method is None:
+        raise ValueError(f"Unsupported fusion: {fusion} (expected one of {sorted(_SERVER_FUSIONS)})")
+    return method
+
+
+def _dense_leg_params(params: Dict[str, Any], default_top_k: int) -> Dict[str, Any]:
+    return {
+        "dense_top_k": int(params.get("dense_top_k", default_top_k)),
+        "dense_backend": params.get("dense_backend", "qdrant"),
+    }
+
+
+def _rescore_stage(params: Dict[str, Any]) -> str:
+    # The memory store already holds the vectors and display fields; only
+    # Qdrant needs to send them.
+    return "ids" if params.get("dense_backend", "qdrant") == "memory" else "rescore"
+
+
+def _memory_payload_hits(
+    ctx: RetrievalContext,
+    hits: List[Tuple[str, float, Dict[str, Any]]],
+    stage: str,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    # "ids" pools arrive without payloads; take the display fields from the store.
+    if stage != "ids" or not hits:
+        return hits
+    store = _memory_store(ctx)
+    rows = store.rows_by_id
+    return [
+        (point_id, score, payload or (store.payload(rows[point_id], RESULT_PAYLOAD_FIELDS) if point_id in rows else {}))
+        for point_id, score, payload in hits
+    ]
 
+
+def _sparse_leg_params(params: Dict[str, Any], default_top_k: int) -> Dict[str, Any]:
+    return {
+        "sparse_top_k": int(params.get("sparse_top_k", default_top_k)),
+        "bm25_k1": float(params.get("bm25_k1", 1.2)),
+        "bm25_b": float(params.get("bm25_b", 0.75)),
+        "bm25_backend": params.get("bm25_backend", "qdrant"),
+    }
+
+
+def _format_dense_results(ctx: RetrievalContext, points: Iterable[Any]) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
-    for hit in response.points:
+    for hit in points:
         payload = hit.payload or {}
         dense_score = hit.score
         if dense_score is None:
@@ -102,7 +428,7 @@ def _retrieve_dense_only(
                 "sparse_score": None,
                 "final_score": dense_score,
                 "score": dense_score,
-                "match_explanation": _explain_dense_only(filters),
+                "match_explanation": _explain_dense_only(ctx.filters),
                 "year": payload.get("year"),
                 "director": payload.get("director"),
                 "cast": payload.get("cast"),
@@ -112,58 +438,10 @@ def _retrieve_dense_only(
     return results
 
 
-def _retrieve_sparse_only(
-    query: str,
-    params: Dict[str, Any],
-    filters: Optional[Dict[str, Any]],
-    collection_name: str,
-) -> List[Dict[str, Any]]:
-    sparse_top_k = int(params.get("sparse_top_k", 10))
-    bm25_k1 = float(params.get("bm25_k1", 1.2))
-    bm25_b = float(params.get("bm25_b", 0.75))
-    backend = params.get("bm25_backend", "qdrant")
-
-    client = get_client()
-    query_filter = _build_filter(filters)
-
-    if backend == "qdrant":
-        try:
-            bm25_config = Bm25Config(
-                k=bm25_k1,
-                b=bm25_b,
-                tokenizer=TokenizerType.WORD,
-                lowercase=True,
-                stopwords=Language.ENGLISH,
-            )
-            bm25_query = Document(text=query, model="Qdrant/Bm25", options=bm25_config)
-            response = client.query_points(
-                collection_name=collection_name,
-                query=bm25_query,
-                query_filter=query_filter,
-                limit=sparse_top_k,
-                with_payload=True,
-                with_vectors=False,
-            )
-            return _format_sparse_results(query, response.points, filters)
-        except (UnexpectedResponse, ValueError):
-            # Fall back to local BM25 scoring if Qdrant BM25 is unavailable
-            pass
-
-    points, _ = client.scroll(
-        collection_name=collection_name,
-        scroll_filter=query_filter,
-        limit=1000,
-        with_payload=True,
-        with_vectors=False,
-    )
-    return _local_bm25_rank(query, points, sparse_top_k, bm25_k1, bm25_b, filters)
-
-
-def _retrieve_dense_recall_sparse_rerank(
-    query: str,
+def _rerank_dense_candidates(
+    ctx: RetrievalContext,
+    points: Iterable[Any],
     params: Dict[str, Any],
-    filters: Optional[Dict[str, Any]],
-    collection_name: str,
 ) -> List[Dict[str, Any]]:
     dense_top_k = int(params.get("dense_top_k", 50))
     rerank_depth = int(params.get("rerank_depth", dense_top_k))
@@ -174,24 +452,8 @@ def _retrieve_dense_recall_sparse_rerank(
     fusion_beta = float(params.get("fusion_beta", 0.5))
     score_norm = params.get("score_norm", "minmax")
 
-    query_filter = _build_filter(filters)
-
-    encoder = load_encoder(MODEL_NAME)
-    query_vector = embed_text(encoder.model, query)
-
-    client = get_client()
-    response = client.query_points(
-        collection_name=collection_name,
-        query=query_vector,
-        using=DENSE_VECTOR_NAME,
-        query_filter=query_filter,
-        limit=dense_top_k,
-        with_payload=True,
-        with_vectors=False,
-    )
-
     candidates: List[Dict[str, Any]] = []
-    for hit in response.points:
+    for hit in points:
         payload = hit.payload or {}
         if hit.score is None:
             continue
@@ -209,12 +471,8 @@ def _retrieve_dense_recall_sparse_rerank(
     rerank_depth = min(rerank_depth, len(candidates))
     candidates = candidates[:rerank_depth]
 
-    query_tokens = _tokenize(query)
-    docs = [(c["id"], _tokenize(c["payload"].get("sparse_text") or "")) for c in candidates]
-    sparse_scores = _bm25_scores(query_tokens, docs, bm25_k1, bm25_b)
-
     dense_vals = [c["dense_score"] for c in candidates]
-    sparse_vals = [sparse_scores.get(c["id"], 0.0) for c in candidates]
+    sparse_vals = _corpus_bm25_scores(ctx, [c["payload"] for c in candidates], bm25_k1, bm25_b)
 
     if rerank_mode == "sparse":
         final_scores = sparse_vals
@@ -236,7 +494,9 @@ def _retrieve_dense_recall_sparse_rerank(
                 "sparse_score": sparse_score,
                 "final_score": final_score,
                 "score": final_score,
-                "match_explanation": _explain_dense_then_sparse(query, payload, filters, sparse_score),
+                "match_explanation": _explain_dense_then_sparse(
+                    ctx.query, payload, ctx.filters, sparse_score
+                ),
                 "year": payload.get("year"),
                 "director": payload.get("director"),
                 "cast": payload.get("cast"),
@@ -248,64 +508,29 @@ def _retrieve_dense_recall_sparse_rerank(
     return results
 
 
-def _retrieve_sparse_prefilter_dense_rank(
-    query: str,
+def _rank_sparse_prefilter(
+    ctx: RetrievalContext,
+    hits: Iterable[Tuple[str, float, Dict[str, Any]]],
+    dense_scores: Dict[str, float],
     params: Dict[str, Any],
-    filters: Optional[Dict[str, Any]],
-    collection_name: str,
 ) -> List[Dict[str, Any]]:
-    sparse_top_k = int(params.get("sparse_top_k", 50))
     dense_top_k = int(params.get("dense_top_k", 10))
-    bm25_k1 = float(params.get("bm25_k1", 1.2))
-    bm25_b = float(params.get("bm25_b", 0.75))
-    backend = params.get("bm25_backend", "qdrant")
-
-    sparse_params = {
-        "sparse_top_k": sparse_top_k,
-        "bm25_k1": bm25_k1,
-        "bm25_b": bm25_b,
-        "bm25_backend": backend,
-    }
-    sparse_results = _retrieve_sparse_only(query, sparse_params, filters, collection_name)
-    if not sparse_results:
-        return []
-
-    candidate_ids = [r["id"] for r in sparse_results]
-    sparse_by_id = {r["id"]: r for r in sparse_results}
-
-    encoder = load_encoder(MODEL_NAME)
-    query_vector = embed_text(encoder.model, query)
-
-    id_filter = Filter(must=[HasIdCondition(has_id=candidate_ids)])
-
-    client = get_client()
-    response = client.query_points(
-        collection_name=collection_name,
-        query=query_vector,
-        using=DENSE_VECTOR_NAME,
-        query_filter=id_filter,
-        limit=len(candidate_ids),
-        with_payload=True,
-        with_vectors=False,
-    )
 
     results: List[Dict[str, Any]] = []
-    for hit in response.points:
-        payload = hit.payload or {}
-        dense_score = hit.score
+    for point_id, sparse_score, payload in hits:
+        dense_score = dense_scores.get(point_id)
         if dense_score is None:
             continue
-        sparse_score = sparse_by_id.get(str(hit.id), {}).get("sparse_score")
         results.append(
             {
-                "id": str(hit.id),
+                "id": point_id,
                 "name": payload.get("name"),
                 "dense_score": dense_score,
                 "sparse_score": sparse_score,
                 "final_score": dense_score,
                 "score": dense_score,
                 "match_explanation": _explain_sparse_prefilter_dense(
-                    query, payload, filters, sparse_score
+                    ctx.query, payload, ctx.filters, sparse_score
                 ),
                 "year": payload.get("year"),
                 "director": payload.get("director"),
@@ -318,55 +543,29 @@ def _retrieve_sparse_prefilter_dense_rank(
     return results[:dense_top_k]
 
 
-def _retrieve_sparse_recall_dense_rerank(
-    query: str,
+def _sparse_recall_candidates(
+    sparse_results: List[Dict[str, Any]],
     params: Dict[str, Any],
-    filters: Optional[Dict[str, Any]],
-    collection_name: str,
 ) -> List[Dict[str, Any]]:
     sparse_top_k = int(params.get("sparse_top_k", 50))
-    dense_top_k = int(params.get("dense_top_k", 10))
     rerank_depth = int(params.get("rerank_depth", sparse_top_k))
-    bm25_k1 = float(params.get("bm25_k1", 1.2))
-    bm25_b = float(params.get("bm25_b", 0.75))
+    return sparse_results[:min(rerank_depth, len(sparse_results))]
+
+
+def _rerank_sparse_candidates(
+    ctx: RetrievalContext,
+    candidates: List[Dict[str, Any]],
+    dense_scores: Dict[str, float],
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_top_k = int(params.get("dense_top_k", 10))
     rerank_mode = params.get("rerank_mode", "dense")  # "dense" or "fusion"
     fusion_alpha = float(params.get("fusion_alpha", 0.5))
     fusion_beta = float(params.get("fusion_beta", 0.5))
     score_norm = params.get("score_norm", "minmax")
-    backend = params.get("bm25_backend", "qdrant")
 
-    sparse_params = {
-        "sparse_top_k": sparse_top_k,
-        "bm25_k1": bm25_k1,
-        "bm25_b": bm25_b,
-        "bm25_backend": backend,
-    }
-    sparse_results = _retrieve_sparse_only(query, sparse_params, filters, collection_name)
-    if not sparse_results:
-        return []
-
-    rerank_depth = min(rerank_depth, len(sparse_results))
-    candidates = sparse_results[:rerank_depth]
     candidate_ids = [r["id"] for r in candidates]
     sparse_scores = {r["id"]: r["sparse_score"] for r in candidates}
-
-    encoder = load_encoder(MODEL_NAME)
-    query_vector = embed_text(encoder.model, query)
-
-    id_filter = Filter(must=[HasIdCondition(has_id=candidate_ids)])
-
-    client = get_client()
-    response = client.query_points(
-        collection_name=collection_name,
-        query=query_vector,
-        using=DENSE_VECTOR_NAME,
-        query_filter=id_filter,
-        limit=len(candidate_ids),
-        with_payload=True,
-        with_vectors=False,
-    )
-
-    dense_scores = {str(hit.id): hit.score for hit in response.points if hit.score is not None}
     dense_vals = [dense_scores.get(cid, 0.0) or 0.0 for cid in candidate_ids]
     sparse_vals = [sparse_scores.get(cid, 0.0) or 0.0 for cid in candidate_ids]
 
@@ -392,7 +591,7 @@ def _retrieve_sparse_recall_dense_rerank(
                 "final_score": final_score,
                 "score": final_score,
                 "match_explanation": _explain_sparse_then_dense(
-                    query, candidate, filters, dense_score
+                    ctx.query, candidate, ctx.filters, dense_score
                 ),
                 "year": candidate.get("year"),
                 "director": candidate.get("director"),
@@ -405,31 +604,17 @@ def _retrieve_sparse_recall_dense_rerank(
     return results[:dense_top_k]
 
 
-def _retrieve_hybrid_combined(
-    query: str,
+def _fuse_hybrid_combined(
+    ctx: RetrievalContext,
+    dense_results: List[Dict[str, Any]],
+    sparse_results: List[Dict[str, Any]],
     params: Dict[str, Any],
-    filters: Optional[Dict[str, Any]],
-    collection_name: str,
 ) -> List[Dict[str, Any]]:
     dense_top_k = int(params.get("dense_top_k", 50))
     sparse_top_k = int(params.get("sparse_top_k", 50))
-    bm25_k1 = float(params.get("bm25_k1", 1.2))
-    bm25_b = float(params.get("bm25_b", 0.75))
     fusion_alpha = float(params.get("fusion_alpha", 0.5))
     fusion_beta = float(params.get("fusion_beta", 0.5))
     score_norm = params.get("score_norm", "minmax")
-    backend = params.get("bm25_backend", "qdrant")
-
-    dense_params = {"dense_top_k": dense_top_k}
-    sparse_params = {
-        "sparse_top_k": sparse_top_k,
-        "bm25_k1": bm25_k1,
-        "bm25_b": bm25_b,
-        "bm25_backend": backend,
-    }
-
-    dense_results = _retrieve_dense_only(query, dense_params, filters, collection_name)
-    sparse_results = _retrieve_sparse_only(query, sparse_params, filters, collection_name)
 
     candidates: Dict[str, Dict[str, Any]] = {}
     for result in dense_results:
@@ -467,7 +652,7 @@ def _retrieve_hybrid_combined(
                 "final_score": final_score,
                 "score": final_score,
                 "match_explanation": _explain_hybrid_combined(
-                    query, payload, filters, dense_score, sparse_score
+                    ctx.query, payload, ctx.filters, dense_score, sparse_score
                 ),
                 "year": payload.get("year"),
                 "director": payload.get("director"),
@@ -480,6 +665,304 @@ def _retrieve_hybrid_combined(
     return results[: max(dense_top_k, sparse_top_k)]
 
 
+def _format_server_fusion_results(
+    ctx: RetrievalContext,
+    points: Iterable[Any],
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    fusion = params.get("fusion", "rrf")
+    results: List[Dict[str, Any]] = []
+    for hit in points:
+        payload = hit.payload or {}
+        if hit.score is None:
+            continue
+        results.append(
+            {
+                "id": str(hit.id),
+                "name": payload.get("name"),
+                "dense_score": None,
+                "sparse_score": None,
+                "final_score": hit.score,
+                "score": hit.score,
+                "match_explanation": _explain_hybrid_server_fusion(
+                    ctx.query, payload, ctx.filters, fusion
+                ),
+                "year": payload.get("year"),
+                "director": payload.get("director"),
+                "cast": payload.get("cast"),
+                "themes": payload.get("themes"),
+            }
+        )
+    return results
+
+
+def _fuse_rrf(
+    ctx: RetrievalContext,
+    dense_results: List[Dict[str, Any]],
+    sparse_results: List[Dict[str, Any]],
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_top_k = int(params.get("dense_top_k", 50))
+    sparse_top_k = int(params.get("sparse_top_k", 50))
+    top_k = int(params.get("top_k", max(dense_top_k, sparse_top_k)))
+    rrf_k = int(params.get("rrf_k", 60))
+
+    fused: Dict[str, float] = {}
+    dense_rank: Dict[str, int] = {}
+    sparse_rank: Dict[str, int] = {}
+    rows: Dict[str, Dict[str, Any]] = {}
+    for rank, result in enumerate(dense_results, 1):
+        dense_rank[result["id"]] = rank
+        fused[result["id"]] = fused.get(result["id"], 0.0) + 1.0 / (rrf_k + rank)
+        rows[result["id"]] = result
+    for rank, result in enumerate(sparse_results, 1):
+        sparse_rank[result["id"]] = rank
+        fused[result["id"]] = fused.get(result["id"], 0.0) + 1.0 / (rrf_k + rank)
+        rows.setdefault(result["id"], result)
+
+    sparse_by_id = {r["id"]: r["sparse_score"] for r in sparse_results}
+    results: List[Dict[str, Any]] = []
+    for cid, final_score in heapq.nlargest(top_k, fused.items(), key=lambda item: item[1]):
+        payload = rows[cid]
+        results.append(
+            {
+                "id": cid,
+                "name": payload.get("name"),
+                "dense_score": payload.get("dense_score"),
+                "sparse_score": sparse_by_id.get(cid),
+                "final_score": final_score,
+                "score": final_score,
+                "match_explanation": _explain_hybrid_rrf(
+                    ctx.query, payload, ctx.filters, dense_rank.get(cid), sparse_rank.get(cid)
+                ),
+                "year": payload.get("year"),
+                "director": payload.get("director"),
+                "cast": payload.get("cast"),
+                "themes": payload.get("themes"),
+            }
+        )
+    return results
+
+
+def _leg_executor() -> ThreadPoolExecutor:
+    global _LEG_EXECUTOR
+    if _LEG_EXECUTOR is None:
+        with _LEG_EXECUTOR_LOCK:
+            if _LEG_EXECUTOR is None:
+                _LEG_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval-leg")
+    return _LEG_EXECUTOR
+
+
+def _dense_points(ctx: RetrievalContext, limit: int, stage: str, backend: str = "qdrant") -> List[Any]:
+    prefetched = ctx.prefetched.get(("dense", limit, stage))
+    if prefetched is not None:
+        return prefetched
+    if backend == "memory":
+        return _memory_dense_points(ctx, limit, stage)
+    response = get_client().query_points(**_dense_request_args(ctx, limit, stage))
+    return response.points
+
+
+def _qdrant_bm25_points(ctx: RetrievalContext, limit: int, stage: str) -> List[Any]:
+    prefetched = ctx.prefetched.get(("sparse", limit, stage))
+    if prefetched is not None:
+        return prefetched
+    response = get_client().query_points(**_bm25_request_args(ctx, limit, stage))
+    return response.points
+
+
+def _dense_request_args(ctx: RetrievalContext, limit: int, stage: str) -> Dict[str, Any]:
+    return {
+        "collection_name": ctx.collection_name,
+        "query": ctx.query_vector,
+        "using": DENSE_VECTOR_NAME,
+        "query_filter": ctx.query_filter,
+        "limit": limit,
+        "with_payload": PAYLOAD_SELECTORS[stage],
+        "with_vectors": VECTOR_SELECTORS.get(stage, False),
+    }
+
+
+def _bm25_request_args(ctx: RetrievalContext, limit: int, stage: str) -> Dict[str, Any]:
+    leg = _bm25_leg(ctx, limit)
+    return {
+        "collection_name": ctx.collection_name,
+        "query": leg["query"],
+        "using": leg["using"],
+        "query_filter": leg["filter"],
+        "limit": leg["limit"],
+        "with_payload": PAYLOAD_SELECTORS[stage],
+        "with_vectors": VECTOR_SELECTORS.get(stage, False),
+    }
+
+
+def _server_fusion_args(ctx: RetrievalContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    return _fusion_request_args(ctx, *_fusion_leg(params)[1:])
+
+
+def _fusion_request_args(
+    ctx: RetrievalContext,
+    dense_top_k: int,
+    sparse_top_k: int,
+    top_k: int,
+    fusion: str,
+) -> Dict[str, Any]:
+    return {
+        "collection_name": ctx.collection_name,
+        "prefetch": [
+            Prefetch(
+                query=ctx.query_vector,
+                using=DENSE_VECTOR_NAME,
+                filter=ctx.query_filter,
+                limit=dense_top_k,
+            ),
+            Prefetch(**_bm25_leg(ctx, sparse_top_k)),
+        ],
+        "query": FusionQuery(fusion=_SERVER_FUSIONS[fusion]),
+        "limit": top_k,
+        "with_payload": PAYLOAD_SELECTORS["results"],
+        "with_vectors": False,
+    }
+
+
+def _memory_store(ctx: RetrievalContext) -> MemoryDenseStore:
+    return get_memory_store(ctx.collection_name, MEMORY_PAYLOAD_FIELDS)
+
+
+def _memory_dense_points(ctx: RetrievalContext, limit: int, stage: str) -> List[Any]:
+    store = _memory_store(ctx)
+    hits = store.search(ctx.query_vector, limit, store.filter_mask(ctx.query_filter))
+    return _memory_points(store, hits, stage)
+
+
+def _memory_points(store: MemoryDenseStore, hits: Iterable[Tuple[int, float]], stage: str) -> List[Any]:
+    # Shape memory hits like Qdrant's, honouring the stage's payload selector.
+    selector = PAYLOAD_SELECTORS[stage]
+    fields = selector if isinstance(selector, list) else ([] if selector is False else None)
+    return [
+        ScoredPoint(id=store.ids[row], version=0, score=score, payload=store.payload(row, fields))
+        for row, score in hits
+    ]
+
+
+def _prefetch_memory_leg(contexts: List[RetrievalContext], leg: Tuple[Any, ...]) -> None:
+    # Every query shares the filters, so one mask and one matrix product serve the batch.
+    store = _memory_store(contexts[0])
+    mask = store.filter_mask(contexts[0].query_filter)
+    queries = np.asarray([ctx.query_vector for ctx in contexts], dtype=np.float32)
+    for ctx, hits in zip(contexts, store.search_many(queries, leg[1], mask)):
+        ctx.prefetched[leg] = _memory_points(store, hits, leg[2])
+
+
+def _prefetch_leg(contexts: List[RetrievalContext], leg: Tuple[Any, ...], batch_size: int) -> None:
+    if leg[0] == "dense":
+        request_args = [_dense_request_args(ctx, *leg[1:]) for ctx in contexts]
+    elif leg[0] == "fusion":
+        request_args = [_fusion_request_args(ctx, *leg[1:]) for ctx in contexts]
+    else:
+        request_args = [_bm25_request_args(ctx, *leg[1:]) for ctx in contexts]
+
+    client = get_client()
+    collection_name = contexts[0].collection_name
+    batch_size = max(1, batch_size)
+    for start in range(0, len(contexts), batch_size):
+        chunk = request_args[start:start + batch_size]
+        requests = [
+            QueryRequest(
+                prefetch=args.get("prefetch"),
+                query=args["query"],
+                using=args.get("using"),
+                filter=args.get("query_filter"),
+                limit=args["limit"],
+                with_payload=args["with_payload"],
+                with_vector=args["with_vectors"],
+            )
+            for args in chunk
+        ]
+        try:
+            responses = client.query_batch_points(collection_name=collection_name, requests=requests)
+        except (UnexpectedResponse, ValueError):
+            # Leave the leg unfetched; each query falls back on its own path.
+            if leg[0] in ("sparse", "fusion"):
+                record_capability_failure(BM25_SPARSE_VECTOR, collection_name)
+            return
+        for ctx, response in zip(contexts[start:start + batch_size], responses):
+            ctx.prefetched[leg] = response.points
+
+
+def _dense_leg(params: Dict[str, Any], default_top_k: int, stage: str = "results") -> Tuple[Any, ...]:
+    return ("dense", int(params.get("dense_top_k", default_top_k)), stage)
+
+
+def _fusion_leg(params: Dict[str, Any]) -> Tuple[Any, ...]:
+    dense_top_k = int(params.get("dense_top_k", 50))
+    sparse_top_k = int(params.get("sparse_top_k", 50))
+    top_k = int(params.get("top_k", max(dense_top_k, sparse_top_k)))
+    _server_fusion(params)
+    return ("fusion", dense_top_k, sparse_top_k, top_k, params.get("fusion", "rrf"))
+
+
+def _server_fusion_legs(params: Dict[str, Any]) -> List[Tuple[Any, ...]]:
+    if params.get("bm25_backend", "qdrant") != "qdrant" or params.get("dense_backend", "qdrant") != "qdrant":
+        # The strategy falls back to client-side fusion (see hybrid_combined).
+        return [_dense_leg(params, 50)] + _sparse_legs(params, 50)
+    return [_fusion_leg(params)]
+
+
+def _sparse_legs(params: Dict[str, Any], default_top_k: int, stage: str = "results") -> List[Tuple[Any, ...]]:
+    if params.get("bm25_backend", "qdrant") != "qdrant":
+        return []
+    return [("sparse", int(params.get("sparse_top_k", default_top_k)), stage)]
+
+
+# First-stage searches each strategy issues, so retrieve_many can batch them.
+# Defaults mirror the ones read inside the strategy functions above.
+_STRATEGY_LEGS: Dict[str, Callable[[Dict[str, Any]], List[Tuple[Any, ...]]]] = {
+    "dense_only": lambda p: [_dense_leg(p, 10)],
+    "sparse_only": lambda p: _sparse_legs(p, 10),
+    "dense_recall_sparse_rerank": lambda p: [_dense_leg(p, 50, "rerank")],
+    "sparse_prefilter_dense_rank": lambda p: _sparse_legs(p, 50, _rescore_stage(p)),
+    "sparse_recall_dense_rerank": lambda p: _sparse_legs(p, 50, _rescore_stage(p)),
+    "hybrid_combined": lambda p: [_dense_leg(p, 50)] + _sparse_legs(p, 50),
+    "hybrid_rrf": lambda p: [_dense_leg(p, 50)] + _sparse_legs(p, 50),
+    "hybrid_server_fusion": _server_fusion_legs,
+}
+
+
+_STRATEGIES: Dict[str, Callable[[RetrievalContext, Dict[str, Any]], List[Dict[str, Any]]]] = {
+    "dense_only": _retrieve_dense_only,
+    "sparse_only": _retrieve_sparse_only,
+    "dense_recall_sparse_rerank": _retrieve_dense_recall_sparse_rerank,
+    "sparse_prefilter_dense_rank": _retrieve_sparse_prefilter_dense_rank,
+    "sparse_recall_dense_rerank": _retrieve_sparse_recall_dense_rerank,
+    "hybrid_combined": _retrieve_hybrid_combined,
+    "hybrid_server_fusion": _retrieve_hybrid_server_fusion,
+    "hybrid_rrf": _retrieve_hybrid_rrf,
+}
+
+
+# Strategies that use the query vector (every strategy but pure BM25).
+_QUERY_VECTOR_STRATEGIES = frozenset(_STRATEGIES) - {"sparse_only"}
+
+# Strategies whose BM25 search runs on the weights stored in Qdrant.
+_QDRANT_BM25_STRATEGIES = frozenset(_STRATEGIES) - {"dense_only", "dense_recall_sparse_rerank"}
+
+
+def _check_bm25_params(strategy: str, params: Dict[str, Any]) -> None:
+    # Stored bm25 weights fix k1 and b at ingest; other values would be ignored silently.
+    if strategy not in _QDRANT_BM25_STRATEGIES or params.get("bm25_backend", "qdrant") != "qdrant":
+        return
+    k1 = float(params.get("bm25_k1", BM25_K1))
+    b = float(params.get("bm25_b", BM25_B))
+    if (k1, b) != (BM25_K1, BM25_B):
+        warnings.warn(
+            f"bm25_k1={k1} / bm25_b={b} have no effect with bm25_backend='qdrant' (stored weights use "
+            f"k1={BM25_K1}, b={BM25_B}); use bm25_backend='local' to tune them",
+            UserWarning,
+            stacklevel=3,
+        )
+
+
 def _build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
     if not filters:
         return None
@@ -511,6 +994,43 @@ def _build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
     return Filter(must=must)
 
 
+def _payload_predicate(filters: Optional[Dict[str, Any]]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Python equivalent of _build_filter for payloads held in memory."""
+    if not filters:
+        return None
+
+    year_min = filters.get("year_min")
+    year_max = filters.get("year_max")
+    check_year = year_min is not None or year_max is not None
+    director = _normalize_value(filters.get("director"))
+    cast = set(_normalize_list(filters.get("cast_includes")))
+    themes = set(_normalize_list(filters.get("themes_includes")))
+    name = _normalize_value(filters.get("name"))
+    if not (check_year or director or cast or themes or name):
+        return None
+
+    def predicate(payload: Dict[str, Any]) -> bool:
+        if check_year:
+            year = payload.get("year")
+            if not isinstance(year, (int, float)):
+                return False
+            if year_min is not None and year < year_min:
+                return False
+            if year_max is not None and year > year_max:
+                return False
+        if director and payload.get("director_norm") != director:
+            return False
+        if cast and cast.isdisjoint(payload.get("cast_norm") or ()):
+            return False
+        if themes and themes.isdisjoint(payload.get("themes_norm") or ()):
+            return False
+        if name and payload.get("name_norm") != name:
+            return False
+        return True
+
+    return predicate
+
+
 def _normalize_value(value: Any) -> Optional[str]:
     if value is None:
         return None
@@ -650,67 +1170,138 @@ def _explain_hybrid_combined(
     return base
 
 
-def _format_sparse_results(
+def _explain_hybrid_rrf(
     query: str,
-    points: Iterable[Any],
+    payload: Dict[str, Any],
     filters: Optional[Dict[str, Any]],
-) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    for hit in points:
-        payload = hit.payload or {}
-        sparse_score = hit.score
-        if sparse_score is None:
-            continue
-        results.append(
-            {
-                "id": str(hit.id),
-                "name": payload.get("name"),
-                "dense_score": None,
-                "sparse_score": sparse_score,
-                "final_score": sparse_score,
-                "score": sparse_score,
-                "match_explanation": _explain_sparse_only(query, payload, filters),
-                "year": payload.get("year"),
-                "director": payload.get("director"),
-                "cast": payload.get("cast"),
-                "themes": payload.get("themes"),
-            }
-        )
-    return results
+    dense_rank: Optional[int],
+    sparse_rank: Optional[int],
+) -> str:
+    base = "Reciprocal rank fusion of dense and sparse"
+    if dense_rank is not None:
+        base += f"; dense rank {dense_rank}"
+    if sparse_rank is not None:
+        matches = _sparse_match_details(query, payload)
+        if matches:
+            base += f"; sparse rank {sparse_rank} ({', '.join(matches)})"
+        else:
+            base += f"; sparse rank {sparse_rank}"
+    if filters:
+        base += "; hard filters applied"
+    return base
+
+
+def _explain_hybrid_server_fusion(
+    query: str,
+    payload: Dict[str, Any],
+    filters: Optional[Dict[str, Any]],
+    fusion: str,
+) -> str:
+    base = f"Server-side {'DBSF' if fusion == 'dbsf' else 'RRF'} fusion of dense and sparse"
+    matches = _sparse_match_details(query, payload)
+    if matches:
+        base += f"; sparse matched ({', '.join(matches)})"
+    if filters:
+        base += "; hard filters applied"
+    return base
+
 
+def _bm25_leg(ctx: RetrievalContext, limit: int) -> Dict[str, Any]:
+    # The Qdrant BM25 leg, shared by plain queries, batches and prefetches:
+    # the query's term counts against the IDF-weighted "bm25" sparse vector.
+    return {
+        "query": ctx.query_sparse_vector,
+        "using": SPARSE_VECTOR_NAME,
+        "filter": ctx.query_filter,
+        "limit": limit,
+    }
 
-def _tokenize(text: str) -> List[str]:
-    return re.findall(r"[a-z0-9]+", text.lower())
 
+def _point_hits(points: Iterable[Any]) -> List[Tuple[str, float, Dict[str, Any]]]:
+    return [(str(hit.id), hit.score, hit.payload or {}) for hit in points if hit.score is not None]
 
-def _local_bm25_rank(
-    query: str,
-    points: Iterable[Any],
+
+def _local_bm25_hits(
+    ctx: RetrievalContext,
     limit: int,
     k1: float,
     b: float,
-    filters: Optional[Dict[str, Any]],
-) -> List[Dict[str, Any]]:
-    point_payloads: Dict[str, Dict[str, Any]] = {}
-    docs: List[tuple[str, List[str]]] = []
-    for point in points:
-        payload = point.payload or {}
-        point_id = str(point.id)
-        point_payloads[point_id] = payload
-        tokens = _tokenize(payload.get("sparse_text") or "")
-        docs.append((point_id, tokens))
-
-    query_tokens = _tokenize(query)
-    if not query_tokens:
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    if not ctx.query_tokens:
         return []
 
-    scores = _bm25_scores(query_tokens, docs, k1, b)
-    scored = []
-    for point_id, score in scores.items():
-        if score <= 0:
-            continue
-        payload = point_payloads[point_id]
-        scored.append(
+    index = get_bm25_index(ctx.collection_name)
+    hits = index.search(ctx.query_tokens, limit, k1, b, _payload_predicate(ctx.filters))
+    return [(index.doc_ids[doc], score, index.payloads[doc]) for doc, score in hits]
+
+
+def _scan_bm25_hits(
+    ctx: RetrievalContext,
+    limit: int,
+    k1: float,
+    b: float,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    return scan_bm25(
+        get_client(),
+        ctx.collection_name,
+        ctx.query_tokens,
+        limit,
+        k1,
+        b,
+        scroll_filter=ctx.query_filter,
+        stats=get_corpus_stats(ctx.collection_name),
+    )
+
+
+def _remember_dense_vectors(ctx: RetrievalContext, points: Iterable[Any]) -> None:
+    for point in points:
+        vector = point.vector.get(DENSE_VECTOR_NAME) if isinstance(point.vector, dict) else None
+        if vector is not None:
+            ctx.dense_vectors[str(point.id)] = vector
+
+
+def _missing_dense_vectors(ctx: RetrievalContext, point_ids: Iterable[str]) -> List[str]:
+    return [point_id for point_id in point_ids if point_id not in ctx.dense_vectors]
+
+
+def _dense_vectors_args(ctx: RetrievalContext, point_ids: List[str]) -> Dict[str, Any]:
+    return {
+        "collection_name": ctx.collection_name,
+        "ids": point_ids,
+        "with_payload": False,
+        "with_vectors": [DENSE_VECTOR_NAME],
+    }
+
+
+def _fetch_dense_vectors(ctx: RetrievalContext, point_ids: List[str], backend: str = "qdrant") -> None:
+    if not point_ids:
+        return
+    if backend == "memory":
+        ctx.dense_vectors.update(_memory_store(ctx).vectors_by_id(point_ids))
+        return
+    # Local BM25 backends return no vectors: fetch them by id, which is
+    # still cheaper than an id-filtered dense search.
+    _remember_dense_vectors(ctx, get_client().retrieve(**_dense_vectors_args(ctx, point_ids)))
+
+
+def _cosine_scores(ctx: RetrievalContext, point_ids: Sequence[str]) -> Dict[str, float]:
+    ids = [point_id for point_id in point_ids if point_id in ctx.dense_vectors]
+    if not ids:
+        return {}
+    matrix = np.asarray([ctx.dense_vectors[point_id] for point_id in ids], dtype=np.float32)
+    query = np.asarray(ctx.query_vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+    scores = (matrix @ query) / np.where(norms > 0, norms, 1.0)
+    return dict(zip(ids, scores.tolist()))
+
+
+def _format_bm25_hits(
+    ctx: RetrievalContext,
+    hits: Iterable[Tuple[str, float, Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for point_id, score, payload in hits:
+        results.append(
             {
                 "id": point_id,
                 "name": payload.get("name"),
@@ -718,53 +1309,33 @@ def _local_bm25_rank(
                 "sparse_score": score,
                 "final_score": score,
                 "score": score,
-                "match_explanation": _explain_sparse_only(query, payload, filters),
+                "match_explanation": _explain_sparse_only(ctx.query, payload, ctx.filters),
                 "year": payload.get("year"),
                 "director": payload.get("director"),
                 "cast": payload.get("cast"),
                 "themes": payload.get("themes"),
             }
         )
-
-    scored.sort(key=lambda r: r["final_score"], reverse=True)
-    return scored[:limit]
+    return results
 
 
-def _bm25_scores(
-    query_tokens: List[str],
-    docs: List[tuple[str, List[str]]],
+def _corpus_bm25_scores(
+    ctx: RetrievalContext,
+    payloads: List[Dict[str, Any]],
     k1: float,
     b: float,
-) -> Dict[str, float]:
-    if not query_tokens:
-        return {}
-
-    doc_lens = [len(tokens) for _, tokens in docs]
-    avgdl = sum(doc_lens) / len(doc_lens) if doc_lens else 1.0
-
-    df: Dict[str, int] = {}
-    for _, tokens in docs:
-        for token in set(tokens):
-            df[token] = df.get(token, 0) + 1
-
-    scores: Dict[str, float] = {}
-    N = len(docs)
-    for (doc_id, tokens), dl in zip(docs, doc_lens):
-        tf: Dict[str, int] = {}
-        for token in tokens:
-            tf[token] = tf.get(token, 0) + 1
-        score = 0.0
-        for token in query_tokens:
-            if token not in tf:
-                continue
-            n_qi = df.get(token, 0)
-            idf = math.log((N - n_qi + 0.5) / (n_qi + 0.5) + 1)
-            freq = tf[token]
-            denom = freq + k1 * (1 - b + b * (dl / avgdl))
-            score += idf * (freq * (k1 + 1) / denom)
-        scores[doc_id] = score
-
-    return scores
+) -> List[float]:
+    if not ctx.query_tokens:
+        return [0.0] * len(payloads)
+
+    stats = get_corpus_stats(ctx.collection_name)
+    doc_tfs: List[Dict[int, int]] = []
+    doc_lens: List[int] = []
+    for payload in payloads:
+        ids, tfs, doc_len = payload_terms(payload)
+        doc_tfs.append(dict(zip(ids, tfs)))
+        doc_lens.append(doc_len)
+    return stats.score(ctx.query_tokens, doc_tfs, doc_lens, k1, b).tolist()
 
 
 def _normalize_scores(values: List[float], method: str) -> List[float]:
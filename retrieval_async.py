@@ -0,0 +1,261 @@
+"""Asyncio retrieval engine on top of AsyncQdrantClient.
+
+Provides aretrieve(), the async counterpart of retrieval.retrieve(). Every
+strategy returns exactly what the synchronous version returns: Qdrant calls
+go through the async client, independent legs (dense and sparse searches,
+query encoding and the BM25 search) run concurrently with asyncio.gather,
+and CPU-bound or blocking work (query encoding, local BM25 search and
+scoring, corpus statistics lookups) runs in a thread pool executor. Result
+assembly, fusion and explanations are shared with retrieval.py.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from db.capabilities import (
+    BM25_SPARSE_VECTOR,
+    capability_available,
+    probe_due,
+    record_capability_failure,
+    record_capability_success,
+)
+from db.qdrant_client import COLLECTION_NAME, get_async_client
+from embeddings.encoder import embed_query
+import retrieval
+from retrieval import RetrievalContext
+
+
+async def aretrieve(
+    query: str,
+    strategy: str,
+    params: Optional[Dict[str, Any]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    collection_name: str = COLLECTION_NAME,
+) -> List[Dict[str, Any]]:
+    """Async unified retrieval entry point.
+
+    Args:
+        query: Natural language query string.
+        strategy: Retrieval strategy name (same as retrieval.retrieve()).
+        params: Strategy-specific parameters (e.g., dense_top_k).
+        filters: Hard filters (year range, director, cast, themes).
+        collection_name: Qdrant collection to search.
+
+    Returns:
+        Ranked list of results with dense_score, sparse_score, final_score,
+        and match_explanation.
+    """
+    if params is None:
+        params = {}
+    handler = _ASYNC_STRATEGIES.get(strategy)
+    if handler is None:
+        raise ValueError(f"Unsupported strategy: {strategy}")
+    retrieval._check_bm25_params(strategy, params)
+    ctx = RetrievalContext(query=query, filters=filters, collection_name=collection_name)
+    return await handler(ctx, params)
+
+
+async def _encode_query(ctx: RetrievalContext) -> List[float]:
+    # Seed the context's cached_property so shared helpers reuse the vector.
+    if "query_vector" not in ctx.__dict__:
+        loop = asyncio.get_running_loop()
+        ctx.query_vector = await loop.run_in_executor(None, embed_query, ctx.query, ctx.model_name)
+    return ctx.query_vector
+
+
+async def _qdrant_bm25_available(ctx: RetrievalContext) -> bool:
+    if probe_due(BM25_SPARSE_VECTOR, ctx.collection_name):
+        # Probing is a blocking get_collection call; keep it off the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, capability_available, BM25_SPARSE_VECTOR, ctx.collection_name)
+    return capability_available(BM25_SPARSE_VECTOR, ctx.collection_name)
+
+
+async def _dense_points(ctx: RetrievalContext, limit: int, stage: str, backend: str = "qdrant") -> List[Any]:
+    await _encode_query(ctx)
+    if backend == "memory":
+        # Exact search is a CPU-bound matrix product.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, retrieval._memory_dense_points, ctx, limit, stage)
+    response = await get_async_client().query_points(**retrieval._dense_request_args(ctx, limit, stage))
+    return response.points
+
+
+async def _cosine_scores(ctx: RetrievalContext, candidate_ids: List[str], backend: str) -> Dict[str, float]:
+    missing = retrieval._missing_dense_vectors(ctx, candidate_ids)
+    if missing and backend == "memory":
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, retrieval._fetch_dense_vectors, ctx, missing, backend)
+    elif missing:
+        records = await get_async_client().retrieve(**retrieval._dense_vectors_args(ctx, missing))
+        retrieval._remember_dense_vectors(ctx, records)
+    await _encode_query(ctx)
+    return retrieval._cosine_scores(ctx, candidate_ids)
+
+
+async def _memory_payload_hits(
+    ctx: RetrievalContext,
+    hits: List[Tuple[str, float, Dict[str, Any]]],
+    stage: str,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    if stage != "ids" or not hits:
+        return hits
+    # The first use loads the memory store; keep that off the event loop.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, retrieval._memory_payload_hits, ctx, hits, stage)
+
+
+async def _retrieve_dense_only(ctx: RetrievalContext, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    dense_top_k = int(params.get("dense_top_k", 10))
+    backend = params.get("dense_backend", "qdrant")
+    return retrieval._format_dense_results(ctx, await _dense_points(ctx, dense_top_k, "results", backend))
+
+
+async def _retrieve_sparse_only(ctx: RetrievalContext, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return retrieval._format_bm25_hits(ctx, await _sparse_hits(ctx, params, "results"))
+
+
+async def _sparse_hits(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+    stage: str,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    sparse_top_k = int(params.get("sparse_top_k", 10))
+    bm25_k1 = float(params.get("bm25_k1", 1.2))
+    bm25_b = float(params.get("bm25_b", 0.75))
+    backend = params.get("bm25_backend", "qdrant")
+
+    if backend == "qdrant":
+        if not ctx.query_tokens:
+            return []
+        if await _qdrant_bm25_available(ctx):
+            try:
+                response = await get_async_client().query_points(
+                    **retrieval._bm25_request_args(ctx, sparse_top_k, stage)
+                )
+            except (UnexpectedResponse, ValueError):
+                record_capability_failure(BM25_SPARSE_VECTOR, ctx.collection_name)
+            else:
+                record_capability_success(BM25_SPARSE_VECTOR, ctx.collection_name)
+                retrieval._remember_dense_vectors(ctx, response.points)
+                return retrieval._point_hits(response.points)
+
+    # Local backends are CPU-bound (index lookups, or a full streaming scan).
+    search = retrieval._scan_bm25_hits if backend == "scan" else retrieval._local_bm25_hits
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, search, ctx, sparse_top_k, bm25_k1, bm25_b)
+
+
+async def _retrieve_dense_recall_sparse_rerank(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_top_k = int(params.get("dense_top_k", 50))
+    points = await _dense_points(ctx, dense_top_k, "rerank", params.get("dense_backend", "qdrant"))
+    # Reranking loads the corpus statistics (a file read, or a full scroll
+    # when there is no stats file) and scores every candidate; keep both off
+    # the event loop.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, retrieval._rerank_dense_candidates, ctx, points, params)
+
+
+async def _retrieve_sparse_prefilter_dense_rank(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    # Encode the query while the BM25 stage is in flight.
+    stage = retrieval._rescore_stage(params)
+    hits, _ = await asyncio.gather(
+        _sparse_hits(ctx, retrieval._sparse_leg_params(params, 50), stage),
+        _encode_query(ctx),
+    )
+    hits = await _memory_payload_hits(ctx, hits, stage)
+    if not hits:
+        return []
+
+    backend = params.get("dense_backend", "qdrant")
+    dense_scores = await _cosine_scores(ctx, [point_id for point_id, _, _ in hits], backend)
+    return retrieval._rank_sparse_prefilter(ctx, hits, dense_scores, params)
+
+
+async def _retrieve_sparse_recall_dense_rerank(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    stage = retrieval._rescore_stage(params)
+    hits, _ = await asyncio.gather(
+        _sparse_hits(ctx, retrieval._sparse_leg_params(params, 50), stage),
+        _encode_query(ctx),
+    )
+    hits = await _memory_payload_hits(ctx, hits, stage)
+    sparse_results = retrieval._format_bm25_hits(ctx, hits)
+    if not sparse_results:
+        return []
+
+    candidates = retrieval._sparse_recall_candidates(sparse_results, params)
+    backend = params.get("dense_backend", "qdrant")
+    dense_scores = await _cosine_scores(ctx, [r["id"] for r in candidates], backend)
+    return retrieval._rerank_sparse_candidates(ctx, candidates, dense_scores, params)
+
+
+async def _retrieve_hybrid_combined(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_results, sparse_results = await asyncio.gather(
+        _retrieve_dense_only(ctx, retrieval._dense_leg_params(params, 50)),
+        _retrieve_sparse_only(ctx, retrieval._sparse_leg_params(params, 50)),
+    )
+    return retrieval._fuse_hybrid_combined(ctx, dense_results, sparse_results, params)
+
+
+async def _retrieve_hybrid_server_fusion(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    retrieval._server_fusion(params)
+    if (
+        params.get("bm25_backend", "qdrant") != "qdrant"
+        or params.get("dense_backend", "qdrant") != "qdrant"
+        or not await _qdrant_bm25_available(ctx)
+    ):
+        # Server-side fusion needs both legs to run inside Qdrant.
+        return await _retrieve_hybrid_combined(ctx, params)
+
+    await _encode_query(ctx)
+    try:
+        response = await get_async_client().query_points(**retrieval._server_fusion_args(ctx, params))
+    except (UnexpectedResponse, ValueError):
+        # Fall back to client-side fusion if Qdrant BM25 is unavailable
+        record_capability_failure(BM25_SPARSE_VECTOR, ctx.collection_name)
+        return await _retrieve_hybrid_combined(ctx, params)
+    record_capability_success(BM25_SPARSE_VECTOR, ctx.collection_name)
+    return retrieval._format_server_fusion_results(ctx, response.points, params)
+
+
+async def _retrieve_hybrid_rrf(
+    ctx: RetrievalContext,
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    dense_results, sparse_results = await asyncio.gather(
+        _retrieve_dense_only(ctx, retrieval._dense_leg_params(params, 50)),
+        _retrieve_sparse_only(ctx, retrieval._sparse_leg_params(params, 50)),
+    )
+    return retrieval._fuse_rrf(ctx, dense_results, sparse_results, params)
+
+
+_ASYNC_STRATEGIES: Dict[
+    str, Callable[[RetrievalContext, Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+] = {
+    "dense_only": _retrieve_dense_only,
+    "sparse_only": _retrieve_sparse_only,
+    "dense_recall_sparse_rerank": _retrieve_dense_recall_sparse_rerank,
+    "sparse_prefilter_dense_rank": _retrieve_sparse_prefilter_dense_rank,
+    "sparse_recall_dense_rerank": _retrieve_sparse_recall_dense_rerank,
+    "hybrid_combined": _retrieve_hybrid_combined,
+    "hybrid_server_fusion": _retrieve_hybrid_server_fusion,
+    "hybrid_rrf": _retrieve_hybrid_rrf,
+}
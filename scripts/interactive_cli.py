@@ -11,6 +11,7 @@ from typing import Dict, List, Optional
 if __package__ is None and __name__ == "__main__":
     sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from embeddings.encoder import preload_encoders
 from retrieval import retrieve
 
 STRATEGY_ORDER = [
@@ -20,6 +21,7 @@ STRATEGY_ORDER = [
     "dense_recall_sparse_rerank",
     "hybrid_combined",
     "hybrid_rrf",
+    "hybrid_server_fusion",
 ]
 
 DEFAULT_PARAMS: Dict[str, Dict[str, float | int | str]] = {
@@ -29,6 +31,7 @@ DEFAULT_PARAMS: Dict[str, Dict[str, float | int | str]] = {
     "dense_recall_sparse_rerank": {"dense_top_k": 30, "rerank_depth": 15},
     "hybrid_combined": {"dense_top_k": 40, "sparse_top_k": 40},
     "hybrid_rrf": {"dense_top_k": 40, "sparse_top_k": 40},
+    "hybrid_server_fusion": {"dense_top_k": 40, "sparse_top_k": 40, "fusion": "rrf"},
 }
 
 
@@ -36,6 +39,7 @@ def main() -> None:
     """Run the interactive CLI loop."""
     print("Semantic Movie Retrieval CLI")
     print("Type 'exit' or 'quit' to stop.\n")
+    preload_encoders()
 
     while True:
         query = _prompt_query()
@@ -15,7 +15,7 @@ from typing import List, Optional
 from qdrant_client.models import FieldCondition, Filter, Range
 
 from db.qdrant_client import COLLECTION_NAME, VECTOR_NAMES, get_client
-from embeddings.encoder import MODEL_NAME, embed_text, load_encoder
+from embeddings.encoder import MODEL_NAME, embed_query
 
 
 def _build_filter(year_gte: Optional[int]) -> Optional[Filter]:
@@ -59,8 +59,7 @@ def search(
     if chunk_method not in VECTOR_NAMES:
         raise ValueError(f"chunk_method must be one of {VECTOR_NAMES}")
 
-    encoder = load_encoder(MODEL_NAME)
-    query_vector = embed_text(encoder.model, query)
+    query_vector = embed_query(query, MODEL_NAME)
     client = get_client()
 
     query_filter = _build_filter(year_gte)
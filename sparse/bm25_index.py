@@ -0,0 +1,334 @@
+"""In-process inverted index for local BM25 scoring.
+
+The index is built once per collection from a full scroll of `sparse_text`
+and kept in memory. Each term maps to a matrix row whose postings (document,
+term frequency) form one row of a CSR matrix; document lengths, avgdl and IDF
+are precomputed. Scoring a query touches only the rows of its terms, so the
+cost follows the number of matching documents rather than the corpus size.
+
+Statistics (N, df, avgdl) are collection-wide, like Qdrant's own BM25 IDF.
+Hard filters are applied to scored documents through a payload predicate.
+
+A cached index is rebuilt when its collection changes: the BM25 stats file
+is rewritten by an ingest, points are added or deleted, or the alias is
+repointed. Long-lived processes check for changes at most every
+INDEX_CHECK_SECONDS.
+
+Constants:
+    INDEX_PAYLOAD_FIELDS: Payload fields kept in memory for result formatting and filtering.
+    INDEX_CHECK_SECONDS: Minimum delay between two change checks of a cached index.
+    WEIGHT_CACHE_SIZE: Number of (k1, b) weight matrices kept per index.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from db.qdrant_client import collection_version, get_client, scroll_points
+
+INDEX_PAYLOAD_FIELDS = (
+    "name",
+    "year",
+    "director",
+    "cast",
+    "themes",
+    "name_norm",
+    "director_norm",
+    "cast_norm",
+    "themes_norm",
+)
+
+INDEX_CHECK_SECONDS = 10.0
+
+# Each weight matrix is as large as the postings; sweeps over k1/b must not
+# keep one per grid point alive.
+WEIGHT_CACHE_SIZE = 4
+
+# Collection name -> (collection version, time of the last check, index).
+_INDEXES: Dict[str, Tuple[Any, float, "Bm25Index"]] = {}
+_INDEX_LOCK = threading.Lock()
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric BM25 tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def term_id(token: str) -> int:
+    """Return the stable 32-bit id of a token (CRC-32 of its UTF-8 bytes).
+
+    Ids are identical across processes and runs, so ingest can store them in
+    payloads and query-time code can compute them independently.
+    """
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def term_frequencies(tokens: Iterable[str]) -> Tuple[List[int], List[int]]:
+    """Return (term ids, term frequencies) of a document, sorted by term id."""
+    counts = Counter(term_id(token) for token in tokens)
+    ids = sorted(counts)
+    return ids, [counts[i] for i in ids]
+
+
+def payload_terms(payload: Dict[str, Any]) -> Tuple[List[int], List[int], int]:
+    """Return (term ids, term frequencies, document length) of a point payload.
+
+    Reads the pre-tokenized sparse_term_ids / sparse_term_tfs / sparse_doc_len
+    fields written by ingest, and tokenizes sparse_text for points ingested
+    before those fields existed.
+    """
+    ids = payload.get("sparse_term_ids")
+    tfs = payload.get("sparse_term_tfs")
+    if ids is not None and tfs is not None:
+        return ids, tfs, payload.get("sparse_doc_len", sum(tfs))
+    tokens = tokenize(payload.get("sparse_text") or "")
+    ids, tfs = term_frequencies(tokens)
+    return ids, tfs, len(tokens)
+
+
+class Bm25Index:
+    """Inverted index over one collection's sparse_text.
+
+    Postings are stored as a SciPy CSR matrix with one row per term and one
+    column per document. The BM25 term weight
+    tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)) is precomputed for
+    every posting once per (k1, b), so scoring a query is a row slice of the
+    query terms and a dot product with their IDF vector.
+
+    Attributes:
+        doc_ids: Qdrant point id (as str) of each indexed document.
+        payloads: Display and filter fields of each document.
+        doc_lens: Token count of each document.
+        avgdl: Average document length.
+        term_rows: Token to matrix row.
+        idf: BM25 IDF of each term id.
+    """
+
+    def __init__(self) -> None:
+        self.doc_ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+        self.avgdl = 1.0
+        self.term_rows: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float64)
+        self._tf = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._weight_cache: OrderedDict[Tuple[float, float], sparse.csr_matrix] = OrderedDict()
+        self._weight_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def from_points(cls, points: Iterable[Any]) -> "Bm25Index":
+        """Build an index from Qdrant points carrying a sparse_text payload.
+
+        Args:
+            points: Records with id and payload (e.g. from scroll_points).
+
+        Returns:
+            Populated index.
+        """
+        return cls._build(
+            (str(point.id), point.payload or {}, tokenize((point.payload or {}).get("sparse_text") or ""))
+            for point in points
+        )
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Tuple[str, Sequence[str]]]) -> "Bm25Index":
+        """Build an index over already tokenized documents (no payloads).
+
+        Args:
+            docs: (document id, tokens) pairs.
+
+        Returns:
+            Populated index whose statistics cover only these documents.
+        """
+        return cls._build((doc_id, {}, tokens) for doc_id, tokens in docs)
+
+    def matches(self, query_tokens: Sequence[str], k1: float, b: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the documents that contain at least one query token.
+
+        Args:
+            query_tokens: Tokenized query (repeated tokens count repeatedly).
+            k1: BM25 term frequency saturation.
+            b: BM25 length normalization.
+
+        Returns:
+            (document indices, BM25 scores) as aligned arrays, in corpus order.
+        """
+        counts = Counter(self.term_rows[token] for token in query_tokens if token in self.term_rows)
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+        rows = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        query_weights = self.idf[rows] * np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        scored = (sparse.csr_matrix(query_weights) @ self._weights(k1, b)[rows]).tocsr()
+        scored.sort_indices()
+        return scored.indices, scored.data
+
+    def scores(self, query_tokens: Sequence[str], k1: float, b: float) -> np.ndarray:
+        """Score every document against a query.
+
+        Args:
+            query_tokens: Tokenized query.
+            k1: BM25 term frequency saturation.
+            b: BM25 length normalization.
+
+        Returns:
+            Dense float64 array of BM25 scores, one per document.
+        """
+        scores = np.zeros(len(self.doc_ids), dtype=np.float64)
+        docs, values = self.matches(query_tokens, k1, b)
+        scores[docs] = values
+        return scores
+
+    def search(
+        self,
+        query_tokens: Sequence[str],
+        limit: int,
+        k1: float,
+        b: float,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return the top documents for a query.
+
+        Args:
+            query_tokens: Tokenized query.
+            limit: Maximum number of results.
+            k1: BM25 term frequency saturation.
+            b: BM25 length normalization.
+            predicate: Optional payload filter; documents failing it are skipped.
+
+        Returns:
+            (document index, score) pairs, best first; ties keep corpus order.
+        """
+        if limit <= 0:
+            return []
+        candidates, candidate_scores = self.matches(query_tokens, k1, b)
+        keep = candidate_scores > 0
+        if predicate is not None:
+            keep &= np.fromiter(
+                (predicate(self.payloads[doc]) for doc in candidates), dtype=bool, count=candidates.size
+            )
+        candidates = candidates[keep]
+        candidate_scores = candidate_scores[keep]
+        if candidates.size == 0:
+            return []
+
+        if candidates.size > limit:
+            # Keep everything tied with the k-th best so the tie order below is stable.
+            kth = np.partition(candidate_scores, candidates.size - limit)[candidates.size - limit]
+            selected = candidate_scores >= kth
+            candidates = candidates[selected]
+            candidate_scores = candidate_scores[selected]
+        order = np.lexsort((candidates, -candidate_scores))[:limit]
+        return [(int(candidates[i]), float(candidate_scores[i])) for i in order]
+
+    @classmethod
+    def _build(cls, docs: Iterable[Tuple[str, Dict[str, Any], Sequence[str]]]) -> "Bm25Index":
+        index = cls()
+        term_rows = array("I")
+        doc_cols = array("I")
+        tfs = array("f")
+        doc_lens = array("I")
+        for doc, (doc_id, payload, tokens) in enumerate(docs):
+            index.doc_ids.append(doc_id)
+            index.payloads.append({field: payload.get(field) for field in INDEX_PAYLOAD_FIELDS})
+            doc_lens.append(len(tokens))
+            for token, freq in Counter(tokens).items():
+                term_rows.append(index.term_rows.setdefault(token, len(index.term_rows)))
+                doc_cols.append(doc)
+                tfs.append(freq)
+
+        n_docs = len(index.doc_ids)
+        index.doc_lens = np.frombuffer(doc_lens, dtype=np.uint32).astype(np.int32)
+        total = int(index.doc_lens.sum())
+        index.avgdl = total / n_docs if total else 1.0
+        index._tf = sparse.csr_matrix(
+            (
+                np.frombuffer(tfs, dtype=np.float32),
+                (np.frombuffer(term_rows, dtype=np.uint32), np.frombuffer(doc_cols, dtype=np.uint32)),
+            ),
+            shape=(len(index.term_rows), n_docs),
+        )
+        df = np.diff(index._tf.indptr).astype(np.float64)
+        index.idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1)
+        return index
+
+    def _weights(self, k1: float, b: float) -> sparse.csr_matrix:
+        key = (k1, b)
+        with self._weight_lock:
+            weights = self._weight_cache.get(key)
+            if weights is not None:
+                self._weight_cache.move_to_end(key)
+                return weights
+        norms = k1 * (1 - b + b * (self.doc_lens / self.avgdl))
+        tf = self._tf.data.astype(np.float64)
+        weights = self._tf.astype(np.float64)
+        weights.data = tf * (k1 + 1) / (tf + norms[self._tf.indices])
+        with self._weight_lock:
+            self._weight_cache[key] = weights
+            while len(self._weight_cache) > WEIGHT_CACHE_SIZE:
+                self._weight_cache.popitem(last=False)
+        return weights
+
+
+def get_bm25_index(collection_name: str) -> Bm25Index:
+    """Get the index for a collection, building it on first use.
+
+    The index is rebuilt when the collection has changed since it was built
+    (checked at most every INDEX_CHECK_SECONDS).
+
+    Args:
+        collection_name: Qdrant collection (or alias) to index.
+
+    Returns:
+        Shared Bm25Index instance.
+    """
+    now = time.monotonic()
+    cached = _INDEXES.get(collection_name)
+    if cached is not None and now - cached[1] < INDEX_CHECK_SECONDS:
+        return cached[2]
+    version = _index_version(collection_name)
+    with _INDEX_LOCK:
+        cached = _INDEXES.get(collection_name)
+        if cached is not None and cached[0] == version:
+            index = cached[2]
+        else:
+            points = scroll_points(
+                get_client(),
+                collection_name,
+                with_payload=["sparse_text", *INDEX_PAYLOAD_FIELDS],
+            )
+            index = Bm25Index.from_points(points)
+        _INDEXES[collection_name] = (version, now, index)
+    return index
+
+
+def _index_version(collection_name: str) -> Tuple[Optional[float], str, Optional[int]]:
+    # Imported here because corpus_stats builds on this module.
+    from sparse.corpus_stats import stats_mtime
+
+    return (stats_mtime(collection_name), *collection_version(get_client(), collection_name))
+
+
+def invalidate_bm25_index(collection_name: Optional[str] = None) -> None:
+    """Drop a cached index (or all of them) so the next query rebuilds it.
+
+    Args:
+        collection_name: Collection whose index to drop; None drops every index.
+    """
+    with _INDEX_LOCK:
+        if collection_name is None:
+            _INDEXES.clear()
+        else:
+            _INDEXES.pop(collection_name, None)
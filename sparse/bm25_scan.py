@@ -0,0 +1,119 @@
+"""Streaming, constant-memory BM25 over a full Qdrant collection.
+
+Used by `bm25_backend="scan"` when the collection is too large to keep an
+in-memory inverted index. Paginated scrolls fetch only `sparse_text`: unless
+corpus statistics from ingest are supplied, a first pass gathers N, avgdl and
+the document frequency of the query terms; the scoring pass then scores every
+(filtered) document into a bounded top-k heap. Display fields are fetched for
+the winners only. Memory use depends on the page size and `limit`, never on
+the collection size.
+
+Constants:
+    SCAN_PAGE_SIZE: Points fetched per scroll request.
+"""
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Filter
+
+from db.qdrant_client import scroll_points
+from sparse.bm25_index import INDEX_PAYLOAD_FIELDS, term_id, tokenize
+from sparse.corpus_stats import CorpusStats
+
+SCAN_PAGE_SIZE = 1000
+
+_SCAN_FIELDS = ["sparse_text"]
+
+
+def scan_bm25(
+    client: QdrantClient,
+    collection_name: str,
+    query_tokens: Sequence[str],
+    limit: int,
+    k1: float,
+    b: float,
+    scroll_filter: Optional[Filter] = None,
+    page_size: int = SCAN_PAGE_SIZE,
+    stats: Optional[CorpusStats] = None,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    """Score a whole collection with BM25 while streaming it page by page.
+
+    Args:
+        client: Qdrant client instance.
+        collection_name: Collection (or alias) to scan.
+        query_tokens: Tokenized query (repeated tokens count repeatedly).
+        limit: Number of results to keep.
+        k1: BM25 term frequency saturation.
+        b: BM25 length normalization.
+        scroll_filter: Optional hard filter applied while scoring.
+        page_size: Points fetched per scroll request.
+        stats: Precomputed collection statistics (see sparse/corpus_stats.py);
+            when given, the statistics pass is skipped.
+
+    Returns:
+        (point id, score, payload) tuples, best first. Payloads hold
+        INDEX_PAYLOAD_FIELDS.
+    """
+    query_terms = set(query_tokens)
+    if not query_terms or limit <= 0:
+        return []
+
+    if stats is None:
+        # Pass 1: collection-wide statistics, restricted to the query terms.
+        N = 0
+        total_len = 0
+        df: Counter = Counter()
+        for point in scroll_points(client, collection_name, with_payload=_SCAN_FIELDS, page_size=page_size):
+            tokens = tokenize((point.payload or {}).get("sparse_text") or "")
+            N += 1
+            total_len += len(tokens)
+            df.update(query_terms.intersection(tokens))
+        stats = CorpusStats(n_docs=N, total_len=total_len, df={term_id(t): n for t, n in df.items()})
+    idf = {term: stats.idf(term) for term in query_terms if stats.doc_freq(term)}
+    if not idf:
+        return []
+    avgdl = stats.avgdl
+
+    # Pass 2: score matching documents into a min-heap of the best `limit`.
+    heap: List[Tuple[float, int, str]] = []
+    for seq, point in enumerate(
+        scroll_points(
+            client,
+            collection_name,
+            scroll_filter=scroll_filter,
+            with_payload=_SCAN_FIELDS,
+            page_size=page_size,
+        )
+    ):
+        tokens = tokenize((point.payload or {}).get("sparse_text") or "")
+        tf = Counter(token for token in tokens if token in idf)
+        if not tf:
+            continue
+        norm = k1 * (1 - b + b * (len(tokens) / avgdl))
+        score = 0.0
+        for token in query_tokens:
+            freq = tf.get(token)
+            if freq:
+                score += idf[token] * (freq * (k1 + 1) / (freq + norm))
+        if score <= 0:
+            continue
+        # Ties keep scroll order: the earlier document wins.
+        entry = (score, -seq, str(point.id))
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    ranked = sorted(heap, reverse=True)
+    records = client.retrieve(
+        collection_name=collection_name,
+        ids=[point_id for _, _, point_id in ranked],
+        with_payload=list(INDEX_PAYLOAD_FIELDS),
+        with_vectors=False,
+    )
+    payloads = {str(record.id): record.payload or {} for record in records}
+    return [(point_id, score, payloads.get(point_id, {})) for score, _, point_id in ranked]
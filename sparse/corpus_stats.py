@@ -0,0 +1,234 @@
+"""Collection-wide BM25 statistics computed at ingest time.
+
+Ingest counts N, total document length and per-term document frequency over
+the whole collection and saves them as JSON, one file per collection. The
+retrieval side loads the file once into a cached CorpusStats object, so
+rerankers score candidates with corpus-level IDF and avgdl instead of
+statistics of the candidate set. Like the local BM25 index, the cached
+statistics are reloaded when the collection changes (stats file rewritten,
+points added or deleted, alias repointed), checked at most every
+STATS_CHECK_SECONDS.
+
+Constants:
+    BM25_STATS_DIR: Directory of the stats files (override with the BM25_STATS_DIR env var).
+    STATS_FORMAT_VERSION: Version of the stats file layout; files with another version are ignored.
+    STATS_CHECK_SECONDS: Minimum delay between two change checks of cached statistics.
+    STATS_PAYLOAD_FIELDS: Payload fields needed to recount statistics from a scroll.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from db.qdrant_client import collection_version, get_client, scroll_points
+from sparse.bm25_index import payload_terms, term_id
+
+BM25_STATS_DIR = os.getenv("BM25_STATS_DIR", ".cache/bm25")
+
+# Version 2 keys document frequencies by term id instead of by token.
+STATS_FORMAT_VERSION = 2
+
+STATS_PAYLOAD_FIELDS = ["sparse_term_ids", "sparse_term_tfs", "sparse_doc_len", "sparse_text"]
+
+STATS_CHECK_SECONDS = 10.0
+
+# Collection name -> (collection version, time of the last check, statistics).
+_STATS: Dict[str, Tuple[Any, float, "CorpusStats"]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+@dataclass
+class CorpusStats:
+    """Document count, length total and document frequencies of a corpus.
+
+    Attributes:
+        n_docs: Number of documents.
+        total_len: Sum of document lengths in tokens.
+        df: Number of documents containing each term, keyed by term id
+            (see sparse.bm25_index.term_id).
+        weights_avgdl: avgdl the collection's stored "bm25" weights were
+            computed with, or None if unknown.
+    """
+
+    n_docs: int = 0
+    total_len: int = 0
+    df: Dict[int, int] = field(default_factory=dict)
+    weights_avgdl: Optional[float] = None
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_len / self.n_docs if self.total_len else 1.0
+
+    @classmethod
+    def from_points(cls, points: Iterable[Any]) -> "CorpusStats":
+        """Compute statistics from Qdrant points (see payload_terms)."""
+        stats = cls()
+        for point in points:
+            ids, _, doc_len = payload_terms(point.payload or {})
+            stats.add_document(ids, doc_len)
+        return stats
+
+    def add_document(self, term_ids: Iterable[int], doc_len: int) -> None:
+        """Count one document given its distinct term ids and length."""
+        self.n_docs += 1
+        self.total_len += doc_len
+        df = self.df
+        for tid in term_ids:
+            df[tid] = df.get(tid, 0) + 1
+
+    def doc_freq(self, token: str) -> int:
+        """Return the number of documents containing a token."""
+        return self.df.get(term_id(token), 0)
+
+    def idf(self, token: str) -> float:
+        """Return the BM25 IDF of a token (tokens never seen get the maximum)."""
+        n_qi = self.doc_freq(token)
+        return math.log((self.n_docs - n_qi + 0.5) / (n_qi + 0.5) + 1)
+
+    def score(
+        self,
+        query_tokens: Sequence[str],
+        doc_tfs: Sequence[Mapping[int, int]],
+        doc_lens: Sequence[int],
+        k1: float,
+        b: float,
+    ) -> np.ndarray:
+        """Score documents against a query with corpus-level IDF and avgdl.
+
+        Args:
+            query_tokens: Tokenized query (repeated tokens count repeatedly).
+            doc_tfs: Term frequencies of each document, keyed by term id.
+            doc_lens: Length of each document in tokens.
+            k1: BM25 term frequency saturation.
+            b: BM25 length normalization.
+
+        Returns:
+            Float64 array of BM25 scores aligned with doc_tfs.
+        """
+        counts = Counter(query_tokens)
+        if not counts or not doc_tfs:
+            return np.zeros(len(doc_tfs), dtype=np.float64)
+        terms = list(counts)
+        ids = [term_id(term) for term in terms]
+        query_weights = np.array([self.idf(term) * counts[term] for term in terms], dtype=np.float64)
+        tf = np.array([[tfs.get(tid, 0) for tid in ids] for tfs in doc_tfs], dtype=np.float64)
+        norms = k1 * (1 - b + b * (np.asarray(doc_lens, dtype=np.float64) / self.avgdl))
+        return (tf * (k1 + 1) / (tf + norms[:, None])) @ query_weights
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "version": STATS_FORMAT_VERSION,
+            "n_docs": self.n_docs,
+            "total_len": self.total_len,
+            "df": self.df,
+        }
+        if self.weights_avgdl is not None:
+            data["weights_avgdl"] = self.weights_avgdl
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "CorpusStats":
+        df = {int(tid): int(count) for tid, count in data["df"].items()}
+        weights_avgdl = data.get("weights_avgdl")
+        return cls(
+            n_docs=int(data["n_docs"]),
+            total_len=int(data["total_len"]),
+            df=df,
+            weights_avgdl=float(weights_avgdl) if weights_avgdl is not None else None,
+        )
+
+
+def stats_path(collection_name: str, root: str = BM25_STATS_DIR) -> str:
+    """Return the stats file of a collection (or alias)."""
+    return os.path.join(root, f"{collection_name}.json")
+
+
+def stats_mtime(collection_name: str, root: str = BM25_STATS_DIR) -> Optional[float]:
+    """Return the modification time of a collection's stats file, or None if there is none."""
+    try:
+        return os.path.getmtime(stats_path(collection_name, root))
+    except OSError:
+        return None
+
+
+def save_corpus_stats(collection_name: str, stats: CorpusStats, root: str = BM25_STATS_DIR) -> None:
+    """Atomically write the stats file of a collection.
+
+    Args:
+        collection_name: Collection (or alias) the statistics describe.
+        stats: Statistics to save.
+        root: Directory of the stats files.
+    """
+    os.makedirs(root, exist_ok=True)
+    path = stats_path(collection_name, root)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stats.to_dict(), f)
+    os.replace(tmp_path, path)
+    with _STATS_LOCK:
+        _STATS.pop(collection_name, None)
+
+
+def load_corpus_stats(collection_name: str, root: str = BM25_STATS_DIR) -> Optional[CorpusStats]:
+    """Read the stats file of a collection.
+
+    Returns None if there is no file or it was written in another format
+    version (e.g. by an older release), so callers fall back as if it were
+    missing.
+    """
+    try:
+        with open(stats_path(collection_name, root), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    if data.get("version") != STATS_FORMAT_VERSION:
+        return None
+    return CorpusStats.from_dict(data)
+
+
+def get_corpus_stats(collection_name: str, root: str = BM25_STATS_DIR) -> CorpusStats:
+    """Get the cached statistics of a collection.
+
+    Loads the stats file written by ingest. Collections without a current
+    stats file (none yet, one in an older format, or one whose document
+    count no longer matches the collection) are scanned instead.
+    Either way the statistics are reloaded when the stats file mtime, the
+    alias target or the points count changes (checked at most every
+    STATS_CHECK_SECONDS), so processes that never see the ingest's stats
+    file still pick up later ingests.
+
+    Args:
+        collection_name: Collection (or alias) to describe.
+        root: Directory of the stats files.
+
+    Returns:
+        Shared CorpusStats instance.
+    """
+    now = time.monotonic()
+    cached = _STATS.get(collection_name)
+    if cached is not None and now - cached[1] < STATS_CHECK_SECONDS:
+        return cached[2]
+    mtime = stats_mtime(collection_name, root)
+    resolved, points_count = collection_version(get_client(), collection_name)
+    version = (mtime, resolved, points_count)
+    with _STATS_LOCK:
+        cached = _STATS.get(collection_name)
+        if cached is not None and cached[0] == version:
+            stats = cached[2]
+        else:
+            stats = load_corpus_stats(collection_name, root) if mtime is not None else None
+            if stats is None or stats.n_docs != points_count:
+                # No usable file, or one left behind by an ingest this
+                # host did not run (the collection has other points).
+                points = scroll_points(get_client(), collection_name, with_payload=STATS_PAYLOAD_FIELDS)
+                stats = CorpusStats.from_points(points)
+        _STATS[collection_name] = (version, now, stats)
+    return stats
@@ -0,0 +1,133 @@
+"""BM25 sparse vectors for Qdrant's named "bm25" sparse vector.
+
+Documents are stored with their BM25 term-frequency component
+
+    tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+
+indexed by stable term id (see sparse.bm25_index.term_id). The collection's
+sparse vector uses Qdrant's IDF modifier, so a query vector holding the
+query term counts scores documents with full BM25 inside Qdrant's inverted
+index, with no server-side inference.
+
+k1 and b are fixed when the weights are written. Weights are written while
+ingest streams, before the run's avgdl is known, so ingest uses the avgdl of
+the collection's existing weights (DEFAULT_AVGDL on a first ingest) and
+afterwards rewrites every weight with reweight_sparse_vectors() when the
+true avgdl differs by more than REWEIGHT_TOLERANCE.
+
+Constants:
+    BM25_K1: Term frequency saturation used for stored weights.
+    BM25_B: Length normalization used for stored weights.
+    DEFAULT_AVGDL: avgdl assumed when no corpus statistics exist yet.
+    REWEIGHT_TOLERANCE: Relative avgdl error above which stored weights are rewritten.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointVectors, SparseVector
+
+from db.qdrant_client import SPARSE_VECTOR_NAME, scroll_points
+from sparse.bm25_index import payload_terms, term_frequencies
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_AVGDL = 16.0
+REWEIGHT_TOLERANCE = 0.02
+
+_TERM_PAYLOAD_FIELDS = ["sparse_term_ids", "sparse_term_tfs", "sparse_doc_len", "sparse_text"]
+
+
+def document_sparse_vectors(
+    payloads: Sequence[Dict[str, Any]],
+    avgdl: float = DEFAULT_AVGDL,
+    k1: float = BM25_K1,
+    b: float = BM25_B,
+) -> List[SparseVector]:
+    """Build BM25 document vectors for a batch of payloads.
+
+    Args:
+        payloads: Point payloads (term ids/tfs are read via payload_terms).
+        avgdl: Average document length of the collection.
+        k1: BM25 term frequency saturation.
+        b: BM25 length normalization.
+
+    Returns:
+        One SparseVector per payload.
+    """
+    terms = [payload_terms(payload) for payload in payloads]
+    if not terms:
+        return []
+    # Weight the whole batch in one pass over the concatenated frequencies.
+    tfs = np.fromiter((tf for _, doc_tfs, _ in terms for tf in doc_tfs), dtype=np.float64)
+    norms = np.repeat(
+        k1 * (1 - b + b * (np.array([doc_len for _, _, doc_len in terms], dtype=np.float64) / avgdl)),
+        [len(ids) for ids, _, _ in terms],
+    )
+    weights = (tfs * (k1 + 1) / (tfs + norms)).tolist()
+
+    vectors: List[SparseVector] = []
+    start = 0
+    for ids, _, _ in terms:
+        end = start + len(ids)
+        vectors.append(SparseVector(indices=list(ids), values=weights[start:end]))
+        start = end
+    return vectors
+
+
+def needs_reweight(weights_avgdl: float, avgdl: float) -> bool:
+    """Return True if weights written with weights_avgdl are materially off for avgdl."""
+    return abs(weights_avgdl - avgdl) > REWEIGHT_TOLERANCE * avgdl
+
+
+def reweight_sparse_vectors(
+    client: QdrantClient,
+    collection_name: str,
+    avgdl: float,
+    page_size: int = 1000,
+) -> int:
+    """Rewrite the stored BM25 weights of every point for a new avgdl.
+
+    Scrolls the pre-tokenized term fields one page at a time and updates only
+    the "bm25" vector of each point; dense vectors and payloads are untouched.
+
+    Args:
+        client: Qdrant client instance.
+        collection_name: Collection (or alias) to rewrite.
+        avgdl: Average document length to weight with.
+        page_size: Points read and updated per request.
+
+    Returns:
+        Number of points rewritten.
+    """
+    rewritten = 0
+    page: List[Any] = []
+    for point in scroll_points(client, collection_name, with_payload=_TERM_PAYLOAD_FIELDS, page_size=page_size):
+        page.append(point)
+        if len(page) == page_size:
+            rewritten += _update_sparse_vectors(client, collection_name, page, avgdl)
+            page = []
+    if page:
+        rewritten += _update_sparse_vectors(client, collection_name, page, avgdl)
+    return rewritten
+
+
+def _update_sparse_vectors(client: QdrantClient, collection_name: str, points: List[Any], avgdl: float) -> int:
+    vectors = document_sparse_vectors([point.payload or {} for point in points], avgdl=avgdl)
+    client.update_vectors(
+        collection_name=collection_name,
+        points=[
+            PointVectors(id=point.id, vector={SPARSE_VECTOR_NAME: vector})
+            for point, vector in zip(points, vectors)
+        ],
+        wait=True,
+    )
+    return len(points)
+
+
+def query_sparse_vector(query_tokens: Sequence[str]) -> SparseVector:
+    """Build the query vector: each distinct term id weighted by its count."""
+    ids, counts = term_frequencies(query_tokens)
+    return SparseVector(indices=ids, values=[float(count) for count in counts])
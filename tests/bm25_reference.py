@@ -0,0 +1,46 @@
+"""Reference BM25 scorer.
+
+baseline_bm25_scores is the scorer retrieval.py used before the inverted
+index, the streaming scan and the ingest-time corpus statistics existed:
+statistics are computed over exactly the documents it is given. Every
+backend must reproduce its scores when given the whole collection.
+"""
+import math
+from typing import Dict, List
+
+
+def baseline_bm25_scores(
+    query_tokens: List[str],
+    docs: List[tuple[str, List[str]]],
+    k1: float,
+    b: float,
+) -> Dict[str, float]:
+    if not query_tokens:
+        return {}
+
+    doc_lens = [len(tokens) for _, tokens in docs]
+    avgdl = sum(doc_lens) / len(doc_lens) if doc_lens else 1.0
+
+    df: Dict[str, int] = {}
+    for _, tokens in docs:
+        for token in set(tokens):
+            df[token] = df.get(token, 0) + 1
+
+    scores: Dict[str, float] = {}
+    N = len(docs)
+    for (doc_id, tokens), dl in zip(docs, doc_lens):
+        tf: Dict[str, int] = {}
+        for token in tokens:
+            tf[token] = tf.get(token, 0) + 1
+        score = 0.0
+        for token in query_tokens:
+            if token not in tf:
+                continue
+            n_qi = df.get(token, 0)
+            idf = math.log((N - n_qi + 0.5) / (n_qi + 0.5) + 1)
+            freq = tf[token]
+            denom = freq + k1 * (1 - b + b * (dl / avgdl))
+            score += idf * (freq * (k1 + 1) / denom)
+        scores[doc_id] = score
+
+    return scores
@@ -0,0 +1,101 @@
+"""Shared fixtures: an in-memory Qdrant client and a deterministic encoder.
+
+Tests never download a model. The fake encoder hashes each word of a text
+into one of EMBEDDING_SIZE buckets, so texts sharing words get similar
+vectors and every run produces the same scores.
+"""
+from pathlib import Path
+import hashlib
+import sys
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import db.qdrant_client as qdrant_module  # noqa: E402
+import embeddings.encoder as encoder  # noqa: E402
+from data.movies import movies  # noqa: E402
+from db.capabilities import reset_capabilities  # noqa: E402
+from db.memory_store import invalidate_memory_store  # noqa: E402
+from sparse import corpus_stats  # noqa: E402
+from sparse.bm25_index import invalidate_bm25_index  # noqa: E402
+
+TEST_COLLECTION = "test_movies"
+
+
+class FakeModel:
+    """Bag-of-words hashing stand-in for a SentenceTransformer."""
+
+    model_name_or_path = "tests/fake-minilm"
+
+    def __init__(self) -> None:
+        self.encoded = 0
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True, **kwargs):
+        single = isinstance(texts, str)
+        items = [texts] if single else list(texts)
+        self.encoded += len(items)
+        vectors = np.zeros((len(items), encoder.EMBEDDING_SIZE), dtype=np.float32)
+        for row, text in enumerate(items):
+            for word in text.lower().split():
+                bucket = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % encoder.EMBEDDING_SIZE
+                vectors[row, bucket] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        return vectors[0] if single else vectors
+
+    def parameters(self):
+        return iter(())
+
+    def buffers(self):
+        return iter(())
+
+
+class FakeTokenizer:
+    do_lower_case = True
+
+    def encode(self, text, add_special_tokens=False):
+        return text.split()
+
+
+def _reset_caches() -> None:
+    invalidate_bm25_index()
+    invalidate_memory_store()
+    corpus_stats._STATS.clear()
+    reset_capabilities()
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeModel()
+    bundle = encoder.EncoderBundle(model=model, tokenizer=FakeTokenizer())
+    monkeypatch.setitem(encoder._ENCODERS, encoder.MODEL_NAME, bundle)
+    monkeypatch.setattr(encoder, "_QUERY_CACHE", encoder.QueryEmbeddingCache())
+    return model
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, fake_model):
+    """Fresh in-memory Qdrant; stats and caches are written under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    qdrant = QdrantClient(":memory:")
+    monkeypatch.setattr(qdrant_module, "_CLIENT", qdrant)
+    _reset_caches()
+    yield qdrant
+    _reset_caches()
+
+
+@pytest.fixture
+def catalog():
+    return [dict(movie) for movie in movies]
+
+
+@pytest.fixture
+def movie_collection(client, catalog):
+    from ingest import ingest_movies
+
+    ingest_movies(TEST_COLLECTION, source=catalog, embedding_cache_dir=None)
+    return TEST_COLLECTION
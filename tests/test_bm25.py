@@ -0,0 +1,149 @@
+"""BM25 scorers against the original per-query implementation (see bm25_reference.py)."""
+from typing import Dict, List
+
+import numpy as np
+import pytest
+from qdrant_client.models import FieldCondition, Filter, PointStruct, Range
+
+from sparse.bm25_index import WEIGHT_CACHE_SIZE, Bm25Index, term_frequencies, tokenize
+from sparse.bm25_scan import scan_bm25
+from sparse.corpus_stats import CorpusStats
+
+from bm25_reference import baseline_bm25_scores
+
+WORDS = ["alien", "space", "ship", "crew", "memory", "dream", "heist", "ai", "robot", "war", "love", "city"]
+QUERIES = [
+    ["alien", "crew"],
+    ["memory", "memory", "dream"],
+    ["ai", "robot", "war", "love"],
+    ["unknown", "space"],
+    ["city"],
+]
+PARAMS = [(1.2, 0.75), (2.0, 0.3), (0.9, 1.0)]
+
+
+@pytest.fixture(scope="module")
+def docs():
+    rng = np.random.default_rng(7)
+    return [
+        (str(doc), [str(word) for word in rng.choice(WORDS, size=int(rng.integers(1, 12)))])
+        for doc in range(60)
+    ]
+
+
+def _top(scores: Dict[str, float], limit: int) -> List[str]:
+    ranked = sorted((doc_id for doc_id, score in scores.items() if score > 0), key=lambda d: (-scores[d], int(d)))
+    return ranked[:limit]
+
+
+@pytest.mark.parametrize("k1,b", PARAMS)
+@pytest.mark.parametrize("query", QUERIES)
+def test_index_scores_match_baseline(docs, query, k1, b):
+    index = Bm25Index.from_documents(docs)
+    expected = baseline_bm25_scores(query, docs, k1, b)
+
+    scores = index.scores(query, k1, b)
+
+    assert scores == pytest.approx([expected[doc_id] for doc_id in index.doc_ids], rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_index_search_ranks_like_baseline(docs, query):
+    index = Bm25Index.from_documents(docs)
+    expected = baseline_bm25_scores(query, docs, 1.2, 0.75)
+
+    hits = index.search(query, limit=10, k1=1.2, b=0.75)
+
+    assert [index.doc_ids[doc] for doc, _ in hits] == _top(expected, 10)
+    for doc, score in hits:
+        assert score == pytest.approx(expected[index.doc_ids[doc]])
+
+
+def test_index_weight_cache_is_bounded(docs):
+    index = Bm25Index.from_documents(docs)
+    first = index.scores(["alien"], 1.2, 0.75)
+    for step in range(WEIGHT_CACHE_SIZE + 3):
+        index.scores(["alien"], 1.0 + step / 10, 0.5)
+
+    assert len(index._weight_cache) == WEIGHT_CACHE_SIZE
+    assert np.array_equal(index.scores(["alien"], 1.2, 0.75), first)
+
+
+@pytest.mark.parametrize("k1,b", PARAMS)
+@pytest.mark.parametrize("query", QUERIES)
+def test_corpus_stats_score_matches_baseline(docs, query, k1, b):
+    stats = CorpusStats()
+    doc_tfs = []
+    for _, tokens in docs:
+        ids, tfs = term_frequencies(tokens)
+        stats.add_document(ids, len(tokens))
+        doc_tfs.append(dict(zip(ids, tfs)))
+    expected = baseline_bm25_scores(query, docs, k1, b)
+
+    scores = stats.score(query, doc_tfs, [len(tokens) for _, tokens in docs], k1, b)
+
+    assert scores == pytest.approx([expected[doc_id] for doc_id, _ in docs], rel=1e-9, abs=1e-12)
+
+
+@pytest.fixture
+def text_collection(client, docs):
+    client.create_collection("bm25_docs", vectors_config={})
+    client.upsert(
+        "bm25_docs",
+        [
+            PointStruct(id=int(doc_id), vector={}, payload={"sparse_text": " ".join(tokens), "year": int(doc_id)})
+            for doc_id, tokens in docs
+        ],
+    )
+    return "bm25_docs"
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_scan_matches_baseline(client, text_collection, docs, query):
+    expected = baseline_bm25_scores(query, docs, 1.2, 0.75)
+
+    hits = scan_bm25(client, text_collection, query, limit=10, k1=1.2, b=0.75, page_size=7)
+
+    assert [point_id for point_id, _, _ in hits] == _top(expected, 10)
+    for point_id, score, _ in hits:
+        assert score == pytest.approx(expected[point_id])
+
+
+def test_scan_with_saved_stats_skips_the_statistics_pass(client, text_collection, docs):
+    stats = CorpusStats()
+    for _, tokens in docs:
+        stats.add_document(term_frequencies(tokens)[0], len(tokens))
+    query = QUERIES[0]
+    scans = []
+    scroll = client.scroll
+
+    def counting_scroll(*args, **kwargs):
+        if kwargs.get("offset") is None:
+            scans.append(kwargs.get("scroll_filter"))
+        return scroll(*args, **kwargs)
+
+    client.scroll = counting_scroll
+    try:
+        with_stats = scan_bm25(client, text_collection, query, limit=10, k1=1.2, b=0.75, stats=stats)
+    finally:
+        client.scroll = scroll
+
+    assert len(scans) == 1
+    assert with_stats == scan_bm25(client, text_collection, query, limit=10, k1=1.2, b=0.75)
+
+
+def test_scan_filters_without_changing_statistics(client, text_collection, docs):
+    query = ["alien", "space", "love"]
+    expected = baseline_bm25_scores(query, docs, 1.2, 0.75)
+    year_filter = Filter(must=[FieldCondition(key="year", range=Range(gte=30))])
+
+    hits = scan_bm25(client, text_collection, query, limit=50, k1=1.2, b=0.75, scroll_filter=year_filter)
+
+    assert hits
+    assert [point_id for point_id, _, _ in hits] == _top({d: s for d, s in expected.items() if int(d) >= 30}, 50)
+    for point_id, score, _ in hits:
+        assert score == pytest.approx(expected[point_id])
+
+
+def test_tokenize_matches_sparse_text_rules():
+    assert tokenize("Sigourney Weaver, A.I. & 2001!") == ["sigourney", "weaver", "a", "i", "2001"]
@@ -0,0 +1,136 @@
+"""Capability probing and circuit-breaker backoff."""
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from db import capabilities
+from db.capabilities import (
+    BACKOFF_INITIAL_SECONDS,
+    BACKOFF_MAX_SECONDS,
+    BM25_SPARSE_VECTOR,
+    CircuitBreaker,
+    capability_available,
+    capability_metrics,
+    record_capability_failure,
+    record_capability_success,
+    reset_capabilities,
+)
+from db.qdrant_client import DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME
+from retrieval import retrieve
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(capabilities, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    answers = []
+    calls = []
+
+    def scripted_probe(collection_name):
+        calls.append(collection_name)
+        return answers.pop(0)
+
+    monkeypatch.setitem(capabilities._PROBES, BM25_SPARSE_VECTOR, scripted_probe)
+    reset_capabilities()
+    yield SimpleNamespace(answers=answers, calls=calls)
+    reset_capabilities()
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    breaker = CircuitBreaker()
+    assert breaker.needs_probe(0.0)
+
+    breaker.record_probe(False, 0.0)
+    assert breaker.retry_at == BACKOFF_INITIAL_SECONDS
+    assert not breaker.needs_probe(BACKOFF_INITIAL_SECONDS - 0.1)
+    assert breaker.needs_probe(BACKOFF_INITIAL_SECONDS)
+
+    delays = []
+    now = 0.0
+    for _ in range(10):
+        breaker.record_failure(now)
+        delays.append(breaker.retry_at - now)
+        now = breaker.retry_at
+    assert delays[:3] == [2 * BACKOFF_INITIAL_SECONDS, 4 * BACKOFF_INITIAL_SECONDS, 8 * BACKOFF_INITIAL_SECONDS]
+    assert max(delays) == delays[-1] == BACKOFF_MAX_SECONDS
+
+
+def test_success_resets_the_backoff():
+    breaker = CircuitBreaker()
+    for now in (0.0, 10.0, 30.0):
+        breaker.record_failure(now)
+    breaker.record_success()
+
+    assert breaker.available
+    assert not breaker.needs_probe(31.0)
+    breaker.record_failure(40.0)
+    assert breaker.retry_at == 40.0 + BACKOFF_INITIAL_SECONDS
+
+
+def test_open_circuit_short_circuits_until_the_retry_time(clock, probe):
+    probe.answers.extend([False, True])
+
+    assert not capability_available(BM25_SPARSE_VECTOR, "movies")
+    clock[0] += BACKOFF_INITIAL_SECONDS - 1
+    assert not capability_available(BM25_SPARSE_VECTOR, "movies")
+    assert len(probe.calls) == 1
+
+    clock[0] += 1
+    assert capability_available(BM25_SPARSE_VECTOR, "movies")
+    assert capability_available(BM25_SPARSE_VECTOR, "movies")
+    assert len(probe.calls) == 2
+    assert capability_metrics() == {
+        f"{BM25_SPARSE_VECTOR}.probes": 2,
+        f"{BM25_SPARSE_VECTOR}.short_circuits": 2,
+    }
+
+
+def test_query_failures_reopen_the_circuit_with_growing_backoff(clock, probe):
+    probe.answers.extend([True, True])
+    assert capability_available(BM25_SPARSE_VECTOR, "movies")
+
+    record_capability_failure(BM25_SPARSE_VECTOR, "movies")
+    clock[0] += BACKOFF_INITIAL_SECONDS
+    assert capability_available(BM25_SPARSE_VECTOR, "movies")
+    record_capability_failure(BM25_SPARSE_VECTOR, "movies")
+    clock[0] += BACKOFF_INITIAL_SECONDS
+    assert not capability_available(BM25_SPARSE_VECTOR, "movies")
+
+    record_capability_success(BM25_SPARSE_VECTOR, "movies")
+    assert capabilities._BREAKERS[(BM25_SPARSE_VECTOR, "movies")].backoff == BACKOFF_INITIAL_SECONDS
+    assert capability_metrics()[f"{BM25_SPARSE_VECTOR}.failures"] == 2
+
+
+def test_collection_without_bm25_vector_falls_back_to_local_scoring(client, movie_collection):
+    client.create_collection(
+        "no_bm25", vectors_config={DENSE_VECTOR_NAME: VectorParams(size=384, distance=Distance.COSINE)}
+    )
+    points, _ = client.scroll(movie_collection, limit=1000, with_payload=True, with_vectors=[DENSE_VECTOR_NAME])
+    client.upsert(
+        "no_bm25",
+        [PointStruct(id=p.id, vector={DENSE_VECTOR_NAME: p.vector[DENSE_VECTOR_NAME]}, payload=p.payload) for p in points],
+    )
+    sparse_requests = []
+    query_points = client.query_points
+
+    def counting_query_points(*args, **kwargs):
+        if kwargs.get("using") == SPARSE_VECTOR_NAME:
+            sparse_requests.append(kwargs["collection_name"])
+        return query_points(*args, **kwargs)
+
+    client.query_points = counting_query_points
+    query = "movies starring Sigourney Weaver"
+    for _ in range(3):
+        fallback = retrieve(query, "sparse_only", {}, collection_name="no_bm25")
+
+    assert sparse_requests == []
+    assert capability_metrics()[f"{BM25_SPARSE_VECTOR}.probes"] == 1
+    assert capability_metrics()[f"{BM25_SPARSE_VECTOR}.short_circuits"] == 3
+    local = retrieve(query, "sparse_only", {"bm25_backend": "local"}, collection_name=movie_collection)
+    assert [r["id"] for r in fallback] == [r["id"] for r in local]
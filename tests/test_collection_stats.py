@@ -0,0 +1,87 @@
+"""Sparse scores use collection-wide BM25 statistics on every backend."""
+import pytest
+
+from db.qdrant_client import scroll_points
+from retrieval import retrieve
+from sparse import corpus_stats
+from sparse.bm25_index import tokenize
+from sparse.corpus_stats import get_corpus_stats
+from sparse.vectors import REWEIGHT_TOLERANCE
+
+from bm25_reference import baseline_bm25_scores
+
+QUERY = "alien space crew survival"
+
+
+def _collection_docs(client, collection_name):
+    points = scroll_points(client, collection_name, with_payload=["sparse_text"])
+    return [(str(point.id), tokenize(point.payload["sparse_text"])) for point in points]
+
+
+def test_dense_recall_rerank_scores_candidates_against_the_whole_collection(client, movie_collection):
+    docs = _collection_docs(client, movie_collection)
+    expected = baseline_bm25_scores(tokenize(QUERY), docs, 1.2, 0.75)
+
+    results = retrieve(QUERY, "dense_recall_sparse_rerank", {"dense_top_k": 5}, collection_name=movie_collection)
+
+    assert len(results) == 5
+    for result in results:
+        assert result["sparse_score"] == pytest.approx(expected[result["id"]])
+    # Statistics of the five candidates alone would give other scores.
+    candidate_ids = {result["id"] for result in results}
+    local = baseline_bm25_scores(tokenize(QUERY), [doc for doc in docs if doc[0] in candidate_ids], 1.2, 0.75)
+    assert any(local[r["id"]] != pytest.approx(r["sparse_score"]) for r in results if r["sparse_score"])
+
+
+@pytest.mark.parametrize("backend", ["local", "scan"])
+def test_filtered_client_side_bm25_keeps_collection_statistics(client, movie_collection, backend):
+    docs = _collection_docs(client, movie_collection)
+    expected = baseline_bm25_scores(tokenize(QUERY), docs, 1.2, 0.75)
+    years = {str(point.id): point.payload["year"] for point in scroll_points(client, movie_collection, with_payload=["year"])}
+
+    results = retrieve(
+        QUERY,
+        "sparse_only",
+        {"bm25_backend": backend, "sparse_top_k": 20},
+        {"year_min": 2000},
+        collection_name=movie_collection,
+    )
+
+    assert results
+    for result in results:
+        assert years[result["id"]] >= 2000
+        assert result["sparse_score"] == pytest.approx(expected[result["id"]])
+
+
+def test_qdrant_bm25_matches_collection_statistics(client, movie_collection):
+    docs = _collection_docs(client, movie_collection)
+    expected = baseline_bm25_scores(tokenize(QUERY), docs, 1.2, 0.75)
+
+    results = retrieve(QUERY, "sparse_only", {"sparse_top_k": 20}, collection_name=movie_collection)
+
+    assert results
+    for result in results:
+        # Stored weights may use an avgdl up to REWEIGHT_TOLERANCE off the true one.
+        assert result["sparse_score"] == pytest.approx(expected[result["id"]], rel=REWEIGHT_TOLERANCE)
+
+
+def test_saved_statistics_describe_the_collection(client, movie_collection):
+    docs = _collection_docs(client, movie_collection)
+
+    stats = get_corpus_stats(movie_collection)
+
+    assert stats.n_docs == len(docs) == client.count(movie_collection).count
+    assert stats.total_len == sum(len(tokens) for _, tokens in docs)
+    assert stats.doc_freq("alien") == sum("alien" in tokens for _, tokens in docs)
+
+
+def test_statistics_reload_when_another_host_changes_the_collection(client, movie_collection, monkeypatch):
+    monkeypatch.setattr(corpus_stats, "STATS_CHECK_SECONDS", 0.0)
+    before = get_corpus_stats(movie_collection)
+    removed = [point.id for point in scroll_points(client, movie_collection, with_payload=False)][:3]
+
+    # Written around this host's stats file, like an ingest elsewhere.
+    client.delete(movie_collection, points_selector=removed, wait=True)
+
+    after = get_corpus_stats(movie_collection)
+    assert after.n_docs == before.n_docs - 3 == client.count(movie_collection).count
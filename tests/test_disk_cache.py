@@ -0,0 +1,97 @@
+"""Append-only embedding cache: persistence, truncation and recovery."""
+import os
+
+import numpy as np
+import pytest
+
+from embeddings.disk_cache import EmbeddingDiskCache
+
+DIM = 4
+MODEL_ID = "tests/model@1"
+
+
+def _vector(seed):
+    return [float(seed + i) for i in range(DIM)]
+
+
+def _open(root, **kwargs):
+    return EmbeddingDiskCache(MODEL_ID, DIM, root=str(root), **kwargs)
+
+
+def _file(cache, name):
+    return os.path.join(cache.path, name)
+
+
+def test_vectors_survive_reopening(tmp_path):
+    cache = _open(tmp_path)
+    cache.add(["alpha", "beta"], [_vector(1), _vector(2)])
+
+    reopened = _open(tmp_path)
+
+    assert len(reopened) == 2
+    assert reopened.lookup(["beta", "gamma", "alpha"]) == [_vector(2), None, _vector(1)]
+    assert (reopened.hits, reopened.misses) == (2, 1)
+
+
+def test_whitespace_only_edits_share_an_entry(tmp_path):
+    cache = _open(tmp_path)
+    cache.add(["a  space\nodyssey"], [_vector(3)])
+    cache.add(["a space odyssey"], [_vector(9)])
+
+    assert len(cache) == 1
+    assert cache.lookup([" a space   odyssey "]) == [_vector(3)]
+
+
+def test_models_and_dtypes_use_separate_directories(tmp_path):
+    float32 = _open(tmp_path)
+    float16 = _open(tmp_path, dtype="float16")
+    other = EmbeddingDiskCache("tests/model@2", DIM, root=str(tmp_path))
+    float32.add(["alpha"], [[0.1, 0.2, 0.3, 0.4]])
+
+    assert len({float32.path, float16.path, other.path}) == 3
+    assert float16.lookup(["alpha"]) == [None]
+    assert other.lookup(["alpha"]) == [None]
+    float16.add(["alpha"], [[0.1, 0.2, 0.3, 0.4]])
+    assert float16.lookup(["alpha"])[0] == pytest.approx([0.1, 0.2, 0.3, 0.4], abs=1e-3)
+
+
+def test_interrupted_append_is_truncated_on_open(tmp_path):
+    cache = _open(tmp_path)
+    cache.add(["alpha", "beta"], [_vector(1), _vector(2)])
+    # A crash after writing vectors but before their keys: one whole row and a torn one.
+    with open(_file(cache, "vectors.bin"), "ab") as f:
+        f.write(np.asarray(_vector(7), dtype=np.float32).tobytes())
+        f.write(b"\x00\x01\x02")
+
+    recovered = _open(tmp_path)
+
+    assert len(recovered) == 2
+    assert os.path.getsize(_file(cache, "vectors.bin")) == 2 * DIM * 4
+    recovered.add(["gamma"], [_vector(3)])
+    assert _open(tmp_path).lookup(["alpha", "beta", "gamma"]) == [_vector(1), _vector(2), _vector(3)]
+
+
+def test_keys_without_vectors_are_dropped(tmp_path):
+    cache = _open(tmp_path)
+    cache.add(["alpha"], [_vector(1)])
+    with open(_file(cache, "keys.bin"), "ab") as f:
+        f.write(b"k" * 16 + b"torn")
+
+    recovered = _open(tmp_path)
+
+    assert len(recovered) == 1
+    assert os.path.getsize(_file(cache, "keys.bin")) == 16
+    recovered.add(["beta"], [_vector(2)])
+    assert _open(tmp_path).lookup(["alpha", "beta"]) == [_vector(1), _vector(2)]
+
+
+def test_empty_cache_reports_misses(tmp_path):
+    cache = _open(tmp_path)
+
+    assert cache.lookup(["alpha"]) == [None]
+    assert len(_open(tmp_path)) == 0
+
+
+def test_rejects_unknown_dtype(tmp_path):
+    with pytest.raises(ValueError):
+        _open(tmp_path, dtype="int8")
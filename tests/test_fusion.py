@@ -0,0 +1,121 @@
+"""Client-side RRF and Qdrant's server-side RRF / DBSF fusion."""
+import pytest
+
+from retrieval import RetrievalContext, _fuse_rrf, retrieve
+
+QUERY = "alien space crew survival"
+LEG_PARAMS = {"dense_top_k": 20, "sparse_top_k": 20}
+
+
+def _result(point_id, dense_score=None, sparse_score=None):
+    return {
+        "id": point_id,
+        "name": f"movie {point_id}",
+        "dense_score": dense_score,
+        "sparse_score": sparse_score,
+        "cast": [],
+        "themes": [],
+    }
+
+
+def _rrf(rankings, k):
+    fused = {}
+    for ranking in rankings:
+        for rank, point_id in enumerate(ranking, 1):
+            fused[point_id] = fused.get(point_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def _dbsf(legs):
+    # Qdrant normalizes each leg to mean +/- 3 sample standard deviations.
+    fused = {}
+    for scores in legs:
+        values = list(scores.values())
+        mean = sum(values) / len(values)
+        std = (sum((value - mean) ** 2 for value in values) / (len(values) - 1)) ** 0.5
+        low, high = mean - 3 * std, mean + 3 * std
+        for point_id, value in scores.items():
+            fused[point_id] = fused.get(point_id, 0.0) + (value - low) / (high - low)
+    return fused
+
+
+def _legs(collection_name):
+    dense = retrieve(QUERY, "dense_only", LEG_PARAMS, collection_name=collection_name)
+    sparse = retrieve(QUERY, "sparse_only", LEG_PARAMS, collection_name=collection_name)
+    return dense, sparse
+
+
+def test_rrf_sums_reciprocal_ranks():
+    dense = [_result("a", dense_score=0.9), _result("b", dense_score=0.8), _result("c", dense_score=0.1)]
+    sparse = [_result("c", sparse_score=7.0), _result("d", sparse_score=3.0)]
+
+    results = _fuse_rrf(RetrievalContext(query="alien"), dense, sparse, {"rrf_k": 10})
+
+    expected = _rrf([["a", "b", "c"], ["c", "d"]], 10)
+    assert [r["id"] for r in results] == ["c", "a", "b", "d"]
+    assert {r["id"]: r["final_score"] for r in results} == pytest.approx(expected)
+    by_id = {r["id"]: r for r in results}
+    assert by_id["c"]["dense_score"] == 0.1 and by_id["c"]["sparse_score"] == 7.0
+    assert by_id["d"]["dense_score"] is None
+    assert "dense rank 3; sparse rank 1" in by_id["c"]["match_explanation"]
+
+
+def test_rrf_keeps_top_k():
+    dense = [_result(str(i), dense_score=1.0 - i / 10) for i in range(5)]
+
+    results = _fuse_rrf(RetrievalContext(query="alien"), dense, [], {"top_k": 2})
+
+    assert [r["id"] for r in results] == ["0", "1"]
+
+
+def test_hybrid_rrf_fuses_its_legs(movie_collection):
+    dense, sparse = _legs(movie_collection)
+
+    results = retrieve(QUERY, "hybrid_rrf", dict(LEG_PARAMS, top_k=40), collection_name=movie_collection)
+
+    expected = _rrf([[r["id"] for r in dense], [r["id"] for r in sparse]], 60)
+    assert {r["id"]: r["final_score"] for r in results} == pytest.approx(expected)
+
+
+def test_server_rrf_matches_rank_fusion_of_the_legs(movie_collection):
+    dense, sparse = _legs(movie_collection)
+
+    results = retrieve(
+        QUERY, "hybrid_server_fusion", dict(LEG_PARAMS, top_k=40, fusion="rrf"), collection_name=movie_collection
+    )
+
+    # Qdrant's RRF scores 1 / (rank + 1) for 1-based ranks.
+    expected = _rrf([[r["id"] for r in dense], [r["id"] for r in sparse]], 1)
+    assert {r["id"]: r["final_score"] for r in results} == pytest.approx(expected)
+    assert all(r["dense_score"] is None and r["sparse_score"] is None for r in results)
+
+
+def test_server_dbsf_matches_distribution_fusion_of_the_legs(movie_collection):
+    dense, sparse = _legs(movie_collection)
+
+    results = retrieve(
+        QUERY, "hybrid_server_fusion", dict(LEG_PARAMS, top_k=40, fusion="dbsf"), collection_name=movie_collection
+    )
+
+    expected = _dbsf(
+        [{r["id"]: r["dense_score"] for r in dense}, {r["id"]: r["sparse_score"] for r in sparse}]
+    )
+    assert {r["id"]: r["final_score"] for r in results} == pytest.approx(expected, rel=1e-4)
+    scores = [r["final_score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_server_fusion_falls_back_to_client_side_fusion(movie_collection):
+    params = dict(LEG_PARAMS, bm25_backend="local")
+
+    fused = retrieve(QUERY, "hybrid_server_fusion", params, collection_name=movie_collection)
+
+    combined = retrieve(QUERY, "hybrid_combined", params, collection_name=movie_collection)
+    assert {r["id"]: r["final_score"] for r in fused} == pytest.approx({r["id"]: r["final_score"] for r in combined})
+    assert fused[0]["match_explanation"] == combined[0]["match_explanation"]
+
+
+def test_unknown_fusion_is_rejected_even_on_fallback(movie_collection):
+    for params in ({"fusion": "borda"}, {"fusion": "borda", "bm25_backend": "local"}):
+        with pytest.raises(ValueError, match="Unsupported fusion"):
+            retrieve(QUERY, "hybrid_server_fusion", params, collection_name=movie_collection)
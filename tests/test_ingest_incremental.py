@@ -0,0 +1,125 @@
+"""Incremental ingest: content-hash diffing, stale deletion and skipped rows."""
+import json
+
+import pytest
+
+from data.readers import iter_jsonl
+from db.qdrant_client import scroll_points
+from ingest import _movie_uuid, ingest_movies
+from sparse.corpus_stats import load_corpus_stats
+
+COLLECTION = "incremental_movies"
+
+
+def _ingest(source, mode="incremental"):
+    return ingest_movies(COLLECTION, source=source, mode=mode, embedding_cache_dir=None)
+
+
+@pytest.fixture
+def ingested(client, catalog):
+    _ingest([dict(movie) for movie in catalog], mode="recreate")
+
+
+def _ids(client):
+    return {str(p.id) for p in scroll_points(client, COLLECTION, with_payload=False)}
+
+
+def _hashes(client):
+    return {str(p.id): p.payload["content_hash"] for p in scroll_points(client, COLLECTION, with_payload=["content_hash"])}
+
+
+def _movie_id(movie):
+    return _movie_uuid(movie["name"], movie["year"])
+
+
+def _assert_stats_cover_collection(client):
+    assert load_corpus_stats(COLLECTION).n_docs == client.count(COLLECTION).count
+
+
+def test_unchanged_catalog_is_neither_embedded_nor_upserted(client, ingested, catalog, fake_model):
+    encoded = fake_model.encoded
+    before = _hashes(client)
+
+    assert _ingest(catalog) == (0, len(catalog))
+
+    assert fake_model.encoded == encoded
+    assert _hashes(client) == before
+
+
+def test_changed_new_and_removed_movies_are_diffed(client, ingested, catalog, fake_model):
+    before = _hashes(client)
+    changed, removed = catalog[0], catalog.pop(5)
+    changed["description"] = "A rewritten synopsis about a lonely lighthouse keeper."
+    added = dict(catalog[3], name="A Brand New Movie")
+    catalog.append(added)
+    encoded = fake_model.encoded
+
+    assert _ingest(catalog) == (2, len(catalog))
+
+    assert fake_model.encoded - encoded == 2
+    after = _hashes(client)
+    assert set(after) == set(before) - {_movie_id(removed)} | {_movie_id(added)}
+    assert after[_movie_id(changed)] != before[_movie_id(changed)]
+    assert {k: v for k, v in after.items() if k not in (_movie_id(changed), _movie_id(added))} == {
+        k: v for k, v in before.items() if k not in (_movie_id(changed), _movie_id(removed))
+    }
+    _assert_stats_cover_collection(client)
+
+
+def test_incremental_into_a_missing_collection_ingests_everything(client, catalog):
+    assert _ingest(catalog[:10]) == (10, 10)
+    assert _ids(client) == {_movie_id(movie) for movie in catalog[:10]}
+
+
+def test_invalid_rows_keep_their_existing_points(client, ingested, catalog, capsys):
+    before = _ids(client)
+    catalog[0] = dict(catalog[0], description="")
+    del catalog[1]["cast"]
+
+    assert _ingest(catalog) == (0, len(catalog))
+
+    assert _ids(client) == before
+    assert "empty description" in capsys.readouterr().out
+    _assert_stats_cover_collection(client)
+
+
+def test_unidentified_skips_disable_stale_deletion(client, ingested, catalog, capsys):
+    before = _ids(client)
+    source = catalog[:-1]
+    source[1] = {"description": "a row without name or year"}
+
+    _ingest(source)
+
+    assert _ids(client) == before
+    assert "not deleting points missing from the source" in capsys.readouterr().out
+    _assert_stats_cover_collection(client)
+
+    _ingest(catalog[:-1])
+    assert _ids(client) == before - {_movie_id(catalog[-1])}
+    _assert_stats_cover_collection(client)
+
+
+def test_undecodable_source_records_are_reported_and_block_deletion(client, ingested, catalog, tmp_path, capsys):
+    path = tmp_path / "movies.jsonl"
+    lines = [json.dumps(movie) for movie in catalog[:-1]]
+    lines.insert(2, "{not json")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    before = _ids(client)
+
+    _ingest(iter_jsonl(str(path)))
+
+    out = capsys.readouterr().out
+    assert f"{path}:3" in out
+    assert _ids(client) == before
+
+
+def test_duplicate_ids_keep_the_first_row(client, catalog):
+    first = catalog[0]
+    duplicate = dict(first, description="Same name and year, different text.")
+
+    assert _ingest([first, duplicate], mode="recreate") == (1, 2)
+    stored = _hashes(client)
+
+    _ingest([first], mode="recreate")
+    assert stored == _hashes(client)
+    assert list(stored) == [_movie_id(first)]
@@ -0,0 +1,132 @@
+"""In-process dense store: filter masks and search against Qdrant."""
+import numpy as np
+import pytest
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PointStruct,
+    Range,
+    VectorParams,
+)
+
+from db.memory_store import MemoryDenseStore, get_memory_store
+from db.qdrant_client import DENSE_VECTOR_NAME, scroll_points
+from retrieval import MEMORY_PAYLOAD_FIELDS, _build_filter, retrieve
+
+RETRIEVAL_FILTERS = [
+    {"year_min": 2000},
+    {"year_min": 1990, "year_max": 1999},
+    {"year_max": 1979},
+    {"director": "James Cameron"},
+    {"cast_includes": ["Sigourney Weaver", "Tom Hardy"]},
+    {"themes_includes": ["survival", "AI"]},
+    {"name": "Alien"},
+    {"year_min": 1980, "cast_includes": ["Sigourney Weaver"], "themes_includes": ["survival"]},
+    {"director": "Nobody At All"},
+]
+
+EDGE_PAYLOADS = [
+    {"year": 1999, "tags": ["a", "b"], "kind": "film"},
+    {"year": 2000, "tags": ["b"], "kind": "series"},
+    {"year": 2001.5, "tags": [], "kind": "film"},
+    {"year": None, "tags": ["a"], "kind": None},
+    {"tags": ["c"]},
+    {"year": "2003", "tags": "a", "kind": "film"},
+]
+
+EDGE_FILTERS = [
+    Filter(must=[FieldCondition(key="year", range=Range(gte=2000))]),
+    Filter(must=[FieldCondition(key="year", range=Range(gt=1999, lt=2001.5))]),
+    Filter(must=[FieldCondition(key="year", range=Range(lte=2001.5))]),
+    Filter(must=[FieldCondition(key="tags", match=MatchValue(value="a"))]),
+    Filter(must=[FieldCondition(key="tags", match=MatchAny(any=["b", "c"]))]),
+    Filter(must=[FieldCondition(key="kind", match=MatchAny(any=["film", "series"]))]),
+    Filter(
+        must=[
+            FieldCondition(key="kind", match=MatchValue(value="film")),
+            FieldCondition(key="year", range=Range(gte=1990)),
+        ]
+    ),
+]
+
+
+def _qdrant_ids(client, collection_name, query_filter):
+    return {str(p.id) for p in scroll_points(client, collection_name, scroll_filter=query_filter, with_payload=False)}
+
+
+def _mask_ids(store, query_filter):
+    mask = store.filter_mask(query_filter)
+    return set(store.ids) if mask is None else {store.ids[row] for row in np.flatnonzero(mask)}
+
+
+@pytest.mark.parametrize("filters", RETRIEVAL_FILTERS)
+def test_retrieval_filters_select_the_same_points(client, movie_collection, filters):
+    store = get_memory_store(movie_collection, MEMORY_PAYLOAD_FIELDS)
+    query_filter = _build_filter(filters)
+
+    assert _mask_ids(store, query_filter) == _qdrant_ids(client, movie_collection, query_filter)
+
+
+@pytest.fixture
+def edge_store(client):
+    client.create_collection("edges", vectors_config={DENSE_VECTOR_NAME: VectorParams(size=2, distance=Distance.COSINE)})
+    client.upsert(
+        "edges",
+        [PointStruct(id=i, vector={DENSE_VECTOR_NAME: [1.0, float(i)]}, payload=p) for i, p in enumerate(EDGE_PAYLOADS)],
+    )
+    return get_memory_store("edges", ["year", "tags", "kind"])
+
+
+@pytest.mark.parametrize("query_filter", EDGE_FILTERS)
+def test_edge_cases_follow_qdrant(client, edge_store, query_filter):
+    # Missing, null and non-numeric values, empty lists and scalar/list mixes.
+    assert _mask_ids(edge_store, query_filter) == _qdrant_ids(client, "edges", query_filter)
+
+
+def test_no_filter_means_no_mask(edge_store):
+    assert edge_store.filter_mask(None) is None
+    assert edge_store.filter_mask(Filter(must=[])) is None
+
+
+@pytest.mark.parametrize(
+    "query_filter",
+    [
+        Filter(should=[FieldCondition(key="kind", match=MatchValue(value="film"))]),
+        Filter(must_not=[FieldCondition(key="kind", match=MatchValue(value="film"))]),
+        Filter(must=[FieldCondition(key="unknown", match=MatchValue(value="film"))]),
+    ],
+)
+def test_unsupported_filters_are_rejected(edge_store, query_filter):
+    with pytest.raises(ValueError):
+        edge_store.filter_mask(query_filter)
+
+
+def test_search_is_exact_cosine_with_stable_ties():
+    vectors = np.array([[1.0, 0.0], [2.0, 0.0], [0.0, 1.0], [1.0, 1.0]], dtype=np.float32)
+    store = MemoryDenseStore(["a", "b", "c", "d"], vectors, {})
+
+    hits = store.search([3.0, 0.0], limit=3)
+
+    assert [row for row, _ in hits] == [0, 1, 3]
+    assert [score for _, score in hits] == pytest.approx([1.0, 1.0, np.sqrt(0.5)])
+    assert store.search([3.0, 0.0], limit=3, mask=np.array([False, True, True, False])) == [
+        (1, pytest.approx(1.0)),
+        (2, pytest.approx(0.0)),
+    ]
+
+
+@pytest.mark.parametrize("filters", [None] + RETRIEVAL_FILTERS[:6])
+def test_memory_backend_matches_qdrant_dense_search(movie_collection, filters):
+    query = "astronauts fight an alien creature aboard a space ship"
+    params = {"dense_top_k": 20}
+
+    qdrant = retrieve(query, "dense_only", params, filters, collection_name=movie_collection)
+    memory = retrieve(query, "dense_only", dict(params, dense_backend="memory"), filters, collection_name=movie_collection)
+
+    assert [r["final_score"] for r in memory] == pytest.approx([r["final_score"] for r in qdrant], abs=1e-5)
+    assert {r["name"] for r in memory if r["final_score"] > qdrant[-1]["final_score"] + 1e-5} == {
+        r["name"] for r in qdrant if r["final_score"] > qdrant[-1]["final_score"] + 1e-5
+    }